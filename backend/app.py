@@ -1,31 +1,85 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
-from utils import create_user, authenticate_user, logout_user
+from utils import create_user, authenticate_user, logout_user, AUTH_POOL, Saturated
 import pandas as pd
 import os
-import json
 import plotly
 import numpy as np
 
 from email.mime.text import MIMEText
-from email_utils import send_email
+from email_utils import MAIL_QUEUE
+from file_cache import FileCache
+from jobs import BacktestJobs
+from result_cache import ResultCache
+from metrics import LatencyMetrics
+from json_provider import FastJSONProvider
+from downsample import LineSeries, OHLCSeries, SeriesCache, parse_date
 import smtplib
 import plotly.graph_objects as go
 import os
+import hashlib
+from functools import partial
+from types import MappingProxyType
 from flask import send_file
 
 # Updated import - removed get_candlestick_figure
 from backtester.soq_backtester.backtester import Backtester
 from backtester.soq_backtester.script import Strategy
+from backtester.soq_backtester.charts import candlestick_payload
+from backtester.soq_backtester.chart_store import ChartStore
+from backtester.soq_backtester.serialization import dumps, loads
+from backtester.soq_backtester.artefacts import VERSIONS, VersionWatcher, current_version, publish
 
 app = Flask(__name__)
+# jsonify() encodes through orjson when installed
+app.json = FastJSONProvider(app)
 CORS(app)
+# Per-endpoint request latency, served at /metrics
+METRICS = LatencyMetrics(window=int(os.getenv("METRICS_WINDOW", 1000)))
+METRICS.install(app)
 
 # Configuration - make path absolute
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # FIX: Correct path to frontend data
 FRONTEND_PATH = os.path.join(BASE_DIR, "data", "frontend_data")
-PRELOADED_DATA = {}
+# Read-only snapshot of the live export, replaced as a whole on reload; requests read it once
+PRELOADED_DATA = MappingProxyType({})
+# Export directory of the last load attempt, so a broken version is not retried on every poll
+LOADED_VERSION = None
+# Serialized chart files, shared by all requests and revalidated by mtime
+CHART_CACHE = FileCache(maxsize=int(os.getenv("CHART_CACHE_SIZE", 256)))
+DATA_PATH = os.getenv("OHLCV_PATH", os.path.join(BASE_DIR, "data", "multi_level_ohlcv.csv"))
+# Upper bound on the rows of a ranged / downsampled series response
+MAX_SERIES_POINTS = int(os.getenv("MAX_SERIES_POINTS", 2000))
+# Upper bound on the tickers of one /candlesticks request
+MAX_BATCH_TICKERS = int(os.getenv("MAX_BATCH_TICKERS", 50))
+CHART_SERIES_CACHE_SIZE = int(os.getenv("CHART_SERIES_CACHE_SIZE", 64))
+
+def load_chart_series(store, path, ticker=None):
+    """Date labels and downsampling pyramid of one chart file, or of ticker in store"""
+    if ticker is not None:
+        chart = loads(store.get(ticker))
+    else:
+        with open(path, 'rb') as f:
+            chart = loads(f.read())
+    if 'data' in chart:
+        # Older exports store one object per bar rather than columns
+        rows = chart['data']
+        chart = {name: [row[name] for row in rows] for name in ('date', 'open', 'high', 'low', 'close', 'position')}
+    ohlc = np.array([chart['open'], chart['high'], chart['low'], chart['close']], dtype=np.float64).T
+    return chart['date'], OHLCSeries(chart['date'], ohlc, np.asarray(chart['position']))
+
+def series_query():
+    """(start, end, points) from ?start=&end=&points=, or None when the full series is wanted"""
+    args = request.args
+    if not any(name in args for name in ('start', 'end', 'points')):
+        return None
+    start = parse_date(args['start']) if args.get('start') else None
+    end = parse_date(args['end']) if args.get('end') else None
+    points = int(args.get('points', MAX_SERIES_POINTS))
+    if points < 3:
+        raise ValueError('points must be at least 3')
+    return start, end, min(points, MAX_SERIES_POINTS)
 
 @app.route('/', methods=['GET', 'POST'])
 def home():
@@ -47,14 +101,29 @@ def contact():
 
     # Admin Email
     admin_msg = f"New message from {name} <{email}>:\n\nSubject: {subject}\n\nMessage:\n{message}"
-    send_email("anujyadav@iitb.ac.in", f"QuantEdge Contact: {subject}", admin_msg)
+    queued = MAIL_QUEUE.enqueue("anujyadav@iitb.ac.in", f"QuantEdge Contact: {subject}", admin_msg)
 
     # Confirmation to user
     user_msg = f"Hi {name},\n\nThanks for contacting QuantEdge! We've received your message:\n\n{message}\n\nWe'll get back to you shortly.\n\n– QuantEdge Team"
-    send_email(email, "Thanks for contacting QuantEdge", user_msg)
+    queued = MAIL_QUEUE.enqueue(email, "Thanks for contacting QuantEdge", user_msg) and queued
 
+    # Delivery happens on the mail queue's threads; only a full queue is reported here
+    if not queued:
+        return jsonify({'success': False, 'message': 'Mail service busy, please try again later'}), 503
     return jsonify({'success': True, 'message': 'Message sent successfully'}), 200
 
+@app.errorhandler(Saturated)
+def auth_saturated(e):
+    """Signup/login bursts beyond the hashing pool's queue are turned away immediately"""
+    response = jsonify({'success': False, 'message': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 429
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Latency percentiles per endpoint plus the auth hashing pool's and mail queue's load"""
+    return jsonify({'endpoints': METRICS.snapshot(), 'auth_pool': AUTH_POOL.stats(), 'mail': MAIL_QUEUE.stats()})
+
 @app.route('/signup', methods=['POST'])
 def signup():
     data = request.get_json()
@@ -91,101 +160,311 @@ def logout():
     return jsonify({'success': success, 'message': message}), (200 if success else 400)
 
 
+def build_snapshot(path):
+    """Load every precomputed file of the export in path into a new read-only snapshot"""
+    loaded = {'path': path}
+
+    # Portfolio summary data
+    portfolio_path = os.path.join(path, "portfolio_summary.json")
+    if os.path.exists(portfolio_path):
+        with open(portfolio_path, 'rb') as f:
+            loaded['portfolio_summary'] = loads(f.read())
+        # Equity curve pyramid for ?start=&end=&points= queries
+        loaded['portfolio_series'] = LineSeries(
+            [row['date'] for row in loaded['portfolio_summary']],
+            [row['equity'] for row in loaded['portfolio_summary']],
+        )
+    else:
+        app.logger.warning(f"Portfolio summary not found at: {portfolio_path}")
+
+    # Candlestick tickers, from the chart store or, for older exports, one file per ticker
+    charts_dir = os.path.join(path, "charts")
+    store = ChartStore.open(path)
+    if store is not None:
+        loaded['chart_store'] = store
+        loaded['tickers'] = store.tickers
+    elif os.path.exists(charts_dir):
+        loaded['tickers'] = [
+            f.replace(".json", "") 
+            for f in os.listdir(charts_dir) 
+            if f.endswith(".json")
+        ]
+    else:
+        app.logger.warning(f"Charts directory not found: {charts_dir}")
+    # Per-ticker pyramids of this export's charts, built on the first ranged request
+    loaded['chart_series'] = SeriesCache(partial(load_chart_series, store), maxsize=CHART_SERIES_CACHE_SIZE)
+
+    # Returns histogram data
+    histogram_path = os.path.join(path, "returns_histogram.json")
+    if os.path.exists(histogram_path):
+        with open(histogram_path, 'rb') as f:
+            loaded['returns_histogram'] = loads(f.read())
+    else:
+        app.logger.warning(f"Returns histogram not found at: {histogram_path}")
+
+    # Load performance metrics
+    metrics_path = os.path.join(path, "performance_metrics.json")
+    if os.path.exists(metrics_path):
+        with open(metrics_path, 'rb') as f:
+            loaded['performance_metrics'] = loads(f.read())
+    else:
+        app.logger.warning(f"Performance metrics not found at: {metrics_path}")
+    return MappingProxyType(loaded)
+
 def load_precomputed_data():
-    """Load all precomputed data into memory for faster access"""
-    global PRELOADED_DATA
-    
+    """Load the current export of FRONTEND_PATH and swap it in as PRELOADED_DATA"""
+    global PRELOADED_DATA, LOADED_VERSION
+    path = current_version(FRONTEND_PATH)
+    LOADED_VERSION = path
+    if path is None:
+        app.logger.warning(f"No export found in: {FRONTEND_PATH}")
+        return
     try:
-        # Portfolio summary data
-        portfolio_path = os.path.join(FRONTEND_PATH, "portfolio_summary.json")
-        if os.path.exists(portfolio_path):
-            with open(portfolio_path) as f:
-                PRELOADED_DATA['portfolio_summary'] = json.load(f)
-        else:
-            app.logger.warning(f"Portfolio summary not found at: {portfolio_path}")
-        
-        # Candlestick tickers
-        charts_dir = os.path.join(FRONTEND_PATH, "charts")
-        if os.path.exists(charts_dir):
-            PRELOADED_DATA['tickers'] = [
-                f.replace(".json", "") 
-                for f in os.listdir(charts_dir) 
-                if f.endswith(".json")
-            ]
-        else:
-            app.logger.warning(f"Charts directory not found: {charts_dir}")
-
-          # NEW: Load returns histogram data
-        histogram_path = os.path.join(FRONTEND_PATH, "returns_histogram.json")
-        if os.path.exists(histogram_path):
-            with open(histogram_path) as f:
-                PRELOADED_DATA['returns_histogram'] = json.load(f)
-        else:
-            app.logger.warning(f"Returns histogram not found at: {histogram_path}")
-
-        # Load performance metrics
-        metrics_path = os.path.join(FRONTEND_PATH, "performance_metrics.json")
-        if os.path.exists(metrics_path):
-            with open(metrics_path) as f:
-                PRELOADED_DATA['performance_metrics'] = json.load(f)
-        else:
-            app.logger.warning(f"Performance metrics not found at: {metrics_path}")
+        snapshot = build_snapshot(path)
     except Exception as e:
-        app.logger.error(f"Error loading precomputed data: {e}")
+        # Requests keep being served from the previous snapshot
+        app.logger.error(f"Error loading precomputed data from {path}: {e}")
+        return
+    # A single assignment: a request sees either the old or the new export, never a mix
+    PRELOADED_DATA = snapshot
+
+def reload_if_changed():
+    """Load the export FRONTEND_PATH/current points at if it is not the one last loaded"""
+    if current_version(FRONTEND_PATH) != LOADED_VERSION:
+        load_precomputed_data()
+
+# Polls FRONTEND_PATH/current, so exports published by any process (the backtester
+# CLI, another worker) go live without a restart
+WATCHER = VersionWatcher(reload_if_changed, interval=float(os.getenv("ARTEFACT_POLL_SECONDS", 1)))
+
+@app.before_request
+def start_watcher():
+    # WSGI servers import the app without running __main__; load the export
+    # before answering, rather than serving 404s until the first poll
+    if not WATCHER.started:
+        WATCHER.check()
+        WATCHER.start()
+
+def publish_results(output_dir):
+    """Publish a finished export as the current version and make it live before the job is reported done"""
+    publish(FRONTEND_PATH, output_dir)
+    WATCHER.check()
+
+JOBS = BacktestJobs(
+    DATA_PATH,
+    # Under versions/ so publishing a job's export is a rename, not a copy
+    staging_dir=os.path.join(FRONTEND_PATH, VERSIONS, ".staging"),
+    publish=publish_results,
+    max_workers=int(os.getenv("BACKTEST_WORKERS", 1)),
+    # Finished jobs stay pollable this long, and at most this many are kept
+    job_ttl=float(os.getenv("BACKTEST_JOB_TTL", 3600)),
+    max_finished=int(os.getenv("BACKTEST_MAX_FINISHED", 1000)),
+    # Exports of earlier runs keyed by data, tickers, initial value and strategy source
+    result_cache=ResultCache(
+        os.getenv("RESULT_CACHE_DIR", os.path.join(BASE_DIR, "data", "result_cache")),
+        max_bytes=int(os.getenv("RESULT_CACHE_BYTES", 2 << 30)),
+    ),
+)
 
 # FIX: Change endpoint name to match frontend
 @app.route('/portfolio_summary', methods=['GET', 'POST'])
 def get_portfolio_summary():
-    """Get portfolio summary data"""
-    if 'portfolio_summary' in PRELOADED_DATA:
-        return jsonify(PRELOADED_DATA['portfolio_summary'])
-    return jsonify({'error': 'Portfolio data not available'}), 404
+    """Get portfolio summary data, optionally limited to ?start=&end= and LTTB-downsampled to ?points="""
+    data = PRELOADED_DATA
+    if 'portfolio_summary' not in data:
+        return jsonify({'error': 'Portfolio data not available'}), 404
+    try:
+        query = series_query()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    summary = data['portfolio_summary']
+    if query is None:
+        return jsonify(summary)
+    rows = data['portfolio_series'].query(*query)
+    return jsonify([summary[i] for i in rows.tolist()])
 
 
 
 @app.route('/tickers', methods=['GET'])
 def get_tickers():
     """Get list of available tickers"""
-    if 'tickers' in PRELOADED_DATA:
-        return jsonify(PRELOADED_DATA['tickers'])
+    data = PRELOADED_DATA
+    if 'tickers' in data:
+        return jsonify(data['tickers'])
     return jsonify({'error': 'Ticker data not available'}), 404
 
+# Precompressed variants stored with each chart by the backtester export, best first
+CHART_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def negotiate_chart_file(file_path):
+    """Pick the best stored encoding of file_path that the client accepts"""
+    for encoding, suffix in CHART_ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(file_path + suffix):
+            return file_path + suffix, encoding
+    return file_path, None
+
+def chart_variant(data, ticker, negotiate=True):
+    """(body, Content-Encoding or None, etag, last modified) of a ticker's chart in snapshot data, None when unknown"""
+    store = data.get('chart_store')
+    if store is not None:
+        if ticker not in store:
+            return None
+        available = store.encodings(ticker)
+        for encoding, _ in CHART_ENCODINGS:
+            if negotiate and request.accept_encodings[encoding] and encoding in available:
+                return store.get(ticker, encoding), encoding, store.etag(ticker, encoding), store.last_modified
+        return store.get(ticker), None, store.etag(ticker), store.last_modified
+
+    # Exports from before the chart store: charts/<ticker>.json plus .gz/.br
+    file_path = os.path.join(data['path'], "charts", f"{ticker}.json")
+    if not os.path.exists(file_path):
+        return None
+    served_path, encoding = negotiate_chart_file(file_path) if negotiate else (file_path, None)
+    cached = CHART_CACHE.get(served_path)
+    return cached.body, encoding, cached.etag, cached.last_modified
+
+def chart_series(data, ticker):
+    """(date labels, OHLCSeries) of a ticker's chart in snapshot data, None when unknown"""
+    store = data.get('chart_store')
+    if store is not None:
+        return data['chart_series'].get(store.path, ticker) if ticker in store else None
+    file_path = os.path.join(data['path'], "charts", f"{ticker}.json")
+    return data['chart_series'].get(file_path) if os.path.exists(file_path) else None
+
+def ranged_chart(data, ticker, query):
+    dates, series = chart_series(data, ticker)
+    first, ohlc, positions = series.query(*query)
+    return candlestick_payload(ticker, [dates[i] for i in first.tolist()], ohlc, positions)
+
 @app.route('/candlestick/<ticker>', methods=['GET'])
 def get_candlestick(ticker):
-    """Get candlestick data for a specific ticker"""
+    """Get candlestick data for a specific ticker, optionally ranged and bucketed like /portfolio_summary"""
     try:
-        file_path = os.path.join(FRONTEND_PATH, "charts", f"{ticker}.json")
-        if not os.path.exists(file_path):
+        try:
+            query = series_query()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        data = PRELOADED_DATA
+        variant = chart_variant(data, ticker)
+        if variant is None:
             return jsonify({'error': 'Ticker not found'}), 404
-        
-        with open(file_path) as f:
-            return jsonify(json.load(f))
+        if query is not None:
+            return jsonify(ranged_chart(data, ticker, query))
+
+        # The stored bytes are already serialized (and compressed); send them untouched
+        body, encoding, etag, last_modified = variant
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        # Turns the response into a 304 when If-None-Match / If-Modified-Since match
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/candlesticks', methods=['GET'])
+def get_candlesticks():
+    """Several tickers' candlestick data in one response: ?tickers=AAA,BBB plus /candlestick's query parameters.
+
+    Returns {"charts": {ticker: chart}, "missing": [unknown tickers]}.
+    """
+    try:
+        tickers = list(dict.fromkeys(t for t in request.args.get('tickers', '').split(',') if t))
+        if not tickers:
+            return jsonify({'error': 'tickers required'}), 400
+        if len(tickers) > MAX_BATCH_TICKERS:
+            return jsonify({'error': f'At most {MAX_BATCH_TICKERS} tickers per request'}), 400
+        try:
+            query = series_query()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Stored charts are spliced in as they are, without decoding them
+        data = PRELOADED_DATA
+        charts, missing, etags = [], [], []
+        for ticker in tickers:
+            variant = chart_variant(data, ticker, negotiate=False)
+            if variant is None:
+                missing.append(ticker)
+                continue
+            body = variant[0] if query is None else dumps(ranged_chart(data, ticker, query))
+            charts.append(dumps(ticker) + b':' + body)
+            etags.append(variant[2])
+        body = b'{"charts":{' + b','.join(charts) + b'},"missing":' + dumps(missing) + b'}'
+
+        response = Response(body, mimetype='application/json')
+        response.set_etag(hashlib.sha1(' '.join(etags + [request.query_string.decode()]).encode()).hexdigest())
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/returns_histogram', methods=['GET'])
 def get_returns_histogram():
     """Get returns histogram data"""
-    if 'returns_histogram' in PRELOADED_DATA:
-        return jsonify(PRELOADED_DATA['returns_histogram'])
+    data = PRELOADED_DATA
+    if 'returns_histogram' in data:
+        return jsonify(data['returns_histogram'])
     return jsonify({'error': 'Returns histogram data not available'}), 404
 
 @app.route('/performance_metrics', methods=['GET'])
 def get_performance_metrics():
-    if 'performance_metrics' in PRELOADED_DATA:
-        return jsonify(PRELOADED_DATA['performance_metrics'])
+    data = PRELOADED_DATA
+    if 'performance_metrics' in data:
+        return jsonify(data['performance_metrics'])
     return jsonify({'error': 'Performance metrics not available'}), 404
 
 @app.route('/run-backtest', methods=['POST'])
 def run_backtest():
-    """Endpoint to run a new backtest (optional)"""
+    """Queue a backtest; params: start, end, tickers, initial_value, strategy, strategy_params"""
+    params = request.get_json(silent=True) or {}
     try:
-        # This would run a new backtest with custom parameters
-        # For now, just reload the precomputed data
-        load_precomputed_data()
-        return jsonify({'status': 'success', 'message': 'Backtest results reloaded'})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        job_id = JOBS.submit(params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except OSError as e:
+        # The price data file is missing or unreadable
+        return jsonify({'error': f'Price data unavailable: {e}'}), 503
+    job = JOBS.get(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'cached': job['cached'],
+        'status_url': f'/run-backtest/{job_id}',
+        'events_url': f'/run-backtest/{job_id}/events',
+    }), 200 if job['cached'] else 202
+
+@app.route('/run-backtest/<job_id>', methods=['GET'])
+def get_backtest_job(job_id):
+    """Poll the status and progress of a queued backtest"""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/run-backtest/<job_id>/events', methods=['GET'])
+def stream_backtest_job(job_id):
+    """Server-sent events with the job status until it finishes or fails"""
+    if JOBS.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        job = None
+        while True:
+            job = JOBS.wait_for_change(job_id, job)
+            if job is None:
+                break
+            yield b"data: " + dumps(job) + b"\n\n"
+            if job['status'] in BacktestJobs.TERMINAL:
+                break
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    return response
 
 if __name__ == '__main__':
     # Ensure data directory exists
@@ -196,10 +475,12 @@ if __name__ == '__main__':
     load_precomputed_data()
     
     # Check if data loaded successfully
-    if PRELOADED_DATA:
+    if PRELOADED_DATA.get('path'):
         print(f"✅ Loaded data for {len(PRELOADED_DATA.get('tickers', []))} tickers")
     else:
         print("⚠️ Warning: No precomputed data loaded")
+    # New exports are picked up as soon as FRONTEND_PATH/current moves
+    WATCHER.start()
     
     print("Starting Flask server on port 5001...")
     app.run(debug=True, port=5001, use_reloader=True)
\ No newline at end of file
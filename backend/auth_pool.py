@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Saturated(Exception):
+    """Raised instead of queueing when a BoundedExecutor already holds max_queue waiting tasks"""
+
+
+class BoundedExecutor:
+    """Thread pool with a hard cap on queued work.
+
+    Meant for the password KDF: hashlib releases the GIL while hashing, so
+    a few threads keep the CPU cores busy without starving request threads,
+    and a burst beyond max_workers + max_queue is rejected right away
+    rather than piling up behind the slow hashes.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, name: str = 'auth'):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool and wait for its result; raises Saturated when full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Saturated('Too many authentication requests in progress')
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._pool.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': min(self.in_flight, self.max_workers),
+                'queued': max(self.in_flight - self.max_workers, 0),
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
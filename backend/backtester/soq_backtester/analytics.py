@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+# Periods per year for daily bars, the same as vectorbt's freq='1D' with its 365-day year
+ANN_FACTOR = 365
+
+TRADE_COLUMNS = [
+    'ticker', 'size', 'entry_date', 'entry_price', 'exit_date', 'exit_price',
+    'pnl', 'return', 'direction', 'status',
+]
+
+
+def value_returns(value: np.ndarray, init_value: float) -> np.ndarray:
+    previous = np.concatenate(([init_value], value[:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = (value - previous) / previous
+    returns[previous < 0] *= -1
+    returns[(previous == 0) & (value == 0)] = 0
+    return returns
+
+
+def drawdown(value: np.ndarray) -> np.ndarray:
+    return value / np.maximum.accumulate(value) - 1
+
+
+def exit_trades(positions: np.ndarray, open_prices: np.ndarray, close_prices: np.ndarray,
+                dates: pd.Index, tickers: pd.Index) -> pd.DataFrame:
+    """Build vectorbt-style exit trades from the engine's per-bar positions.
+
+    Every order that reduces a position closes a trade at that bar's open,
+    priced against the size-weighted average entry of the position. A
+    position still held at the end is reported as one open trade marked at
+    the last close.
+    """
+    orders = np.diff(positions, axis=0, prepend=0)
+    last_close = pd.DataFrame(close_prices).ffill().to_numpy()[-1] if len(close_prices) else []
+    records = []
+
+    def close_trade(col, size, entry_idx, entry_price, exit_idx, exit_price, direction, status):
+        sign = 1 if direction == 'Long' else -1
+        pnl = sign * size * (exit_price - entry_price)
+        records.append((
+            tickers[col], size, dates[entry_idx], entry_price, dates[exit_idx], exit_price,
+            pnl, pnl / (entry_price * size), direction, status,
+        ))
+
+    for col in range(positions.shape[1]):
+        held = 0
+        entry_size = entry_gross = 0.0
+        entry_idx = -1
+        for i in np.flatnonzero(orders[:, col]):
+            order, price = int(orders[i, col]), float(open_prices[i, col])
+            if held == 0:
+                entry_idx, entry_size, entry_gross = i, 0.0, 0.0
+            direction = 'Long' if (held if held else order) > 0 else 'Short'
+            if held == 0 or (held > 0) == (order > 0):
+                entry_size += abs(order)
+                entry_gross += abs(order) * price
+            elif abs(order) <= abs(held):
+                close_trade(col, abs(order), entry_idx, entry_gross / entry_size, i, price, direction, 'Closed')
+                fraction = (entry_size - abs(order)) / entry_size
+                entry_size *= fraction
+                entry_gross *= fraction
+            else:
+                # Reversal: close the whole position and open the remainder the other way
+                close_trade(col, entry_size, entry_idx, entry_gross / entry_size, i, price, direction, 'Closed')
+                entry_idx, entry_size = i, abs(order) - abs(held)
+                entry_gross = entry_size * price
+            held += order
+        if held != 0:
+            direction = 'Long' if held > 0 else 'Short'
+            close_trade(col, entry_size, entry_idx, entry_gross / entry_size,
+                        len(dates) - 1, float(last_close[col]), direction, 'Open')
+
+    return pd.DataFrame.from_records(records, columns=TRADE_COLUMNS)
+
+
+class EnginePortfolio:
+    """Performance analytics computed straight from a finished Backtester run.
+
+    Exposes the subset of vectorbt's Portfolio API that export_results and
+    compute_metrics use, so either object can be passed to them.
+    """
+
+    def __init__(self, backtester, ann_factor: float = ANN_FACTOR):
+        index = backtester.data.index
+        self.init_cash = backtester.initial_value
+        self.ann_factor = ann_factor
+        self._value = pd.Series(backtester.portfolio_history, index=index)
+        self._cash = pd.Series(backtester.cash_history, index=index)
+        self._asset_value = pd.Series(backtester.investment_history, index=index)
+        self._returns = value_returns(backtester.portfolio_history, self.init_cash)
+        self._trades = None
+        self._positions = backtester.position_buffer
+        self._open_prices = backtester.open_prices
+        self._close_prices = backtester.close_prices
+        self._tickers = backtester.tickers
+
+    def value(self) -> pd.Series:
+        return self._value
+
+    def cash(self) -> pd.Series:
+        return self._cash
+
+    def asset_value(self) -> pd.Series:
+        return self._asset_value
+
+    def returns(self) -> pd.Series:
+        return pd.Series(self._returns, index=self._value.index)
+
+    def drawdown(self) -> pd.Series:
+        return pd.Series(drawdown(self._value.to_numpy()), index=self._value.index)
+
+    def total_return(self) -> float:
+        return np.nanprod(self._returns + 1.0) - 1.0
+
+    def annualized_return(self) -> float:
+        return (self.total_return() + 1.0) ** (self.ann_factor / len(self._returns)) - 1
+
+    def annualized_volatility(self) -> float:
+        if len(self._returns) < 2:
+            return np.nan
+        return np.nanstd(self._returns, ddof=1) * self.ann_factor ** 0.5
+
+    def sharpe_ratio(self) -> float:
+        if len(self._returns) < 2:
+            return np.nan
+        std = np.nanstd(self._returns, ddof=1)
+        if std == 0:
+            return np.inf
+        return np.nanmean(self._returns) / std * np.sqrt(self.ann_factor)
+
+    def sortino_ratio(self) -> float:
+        if len(self._returns) < 2:
+            return np.nan
+        downside = np.minimum(self._returns, 0)
+        downside_risk = np.sqrt(np.nanmean(downside ** 2)) * np.sqrt(self.ann_factor)
+        if downside_risk == 0:
+            return np.inf
+        return np.nanmean(self._returns) * self.ann_factor / downside_risk
+
+    def max_drawdown(self) -> float:
+        return np.min(drawdown(np.nancumprod(self._returns + 1.0)))
+
+    def calmar_ratio(self) -> float:
+        max_drawdown = self.max_drawdown()
+        if max_drawdown == 0:
+            return np.nan
+        return self.annualized_return() / np.abs(max_drawdown)
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        if self._trades is None:
+            self._trades = exit_trades(
+                self._positions, self._open_prices, self._close_prices,
+                self._value.index, self._tickers,
+            )
+        return self._trades
+
+    def stats(self) -> pd.Series:
+        trades = self.trades
+        closed = trades[trades['status'] == 'Closed']
+        wins = closed.loc[closed['pnl'] > 0, 'pnl']
+        losses = closed.loc[closed['pnl'] < 0, 'pnl']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.float64(len(wins)) / len(closed) * 100
+            profit_factor = np.float64(wins.sum()) / np.abs(losses.sum()) if len(closed) else np.nan
+
+        return pd.Series({
+            'Start Value': self.init_cash,
+            'End Value': self._value.iloc[-1],
+            'Total Return [%]': self.total_return() * 100,
+            'Max Drawdown [%]': -self.max_drawdown() * 100,
+            'Total Trades': len(trades),
+            'Total Closed Trades': len(closed),
+            'Total Open Trades': len(trades) - len(closed),
+            'Win Rate [%]': win_rate,
+            'Profit Factor': profit_factor,
+            'Sharpe Ratio': self.sharpe_ratio(),
+            'Calmar Ratio': self.calmar_ratio(),
+            'Sortino Ratio': self.sortino_ratio(),
+        })
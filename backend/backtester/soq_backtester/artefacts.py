@@ -0,0 +1,116 @@
+"""Versioned export directories behind an atomically replaced pointer.
+
+Each export goes into its own directory under root/versions and root/current
+is a symlink to the live one. A version is written in a staging directory,
+renamed into place and published by swapping the symlink with os.replace,
+so a reader resolving root/current gets either the previous or the new
+export, never a partly written one. Published versions are never modified;
+an incremental export starts from a copy of the current version.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+CURRENT = 'current'
+VERSIONS = 'versions'
+STAGING_PREFIX = '.staging-'
+# Versions kept after a publish, the live one included
+KEEP_VERSIONS = 3
+# Any of these marks a root written before versioning, which is then served as it is
+LEGACY_FILES = ('portfolio_summary.json', 'charts.index.json', 'charts')
+
+
+def current_version(root: str):
+    """Directory of the live export under root, or None when nothing has been exported yet"""
+    pointer = os.path.join(root, CURRENT)
+    if os.path.islink(pointer):
+        return os.path.realpath(pointer)
+    if any(os.path.exists(os.path.join(root, name)) for name in LEGACY_FILES):
+        return os.path.realpath(root)
+    return None
+
+
+def staging_dir(root: str, base: str = None) -> str:
+    """A new, unpublished directory to export into; a copy of the version `base` when given"""
+    versions = os.path.join(root, VERSIONS)
+    os.makedirs(versions, exist_ok=True)
+    # Inside versions/ so publish() is a rename on the same filesystem
+    path = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=versions)
+    if base is not None:
+        shutil.copytree(base, path, dirs_exist_ok=True, ignore=shutil.ignore_patterns(CURRENT, VERSIONS))
+    return path
+
+
+def publish(root: str, path: str, keep: int = KEEP_VERSIONS) -> str:
+    """Make the finished export in path the current version and return its final directory"""
+    versions = os.path.join(root, VERSIONS)
+    os.makedirs(versions, exist_ok=True)
+    # Sorts in publish order, which prune() relies on
+    now = time.time_ns()
+    name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now // 10**9))}.{now % 10**9:09d}-{uuid.uuid4().hex[:8]}"
+    final = os.path.join(versions, name)
+    shutil.move(path, final)
+
+    # Relative, so the whole root can be moved or mounted elsewhere
+    link = os.path.join(root, f'.{CURRENT}-{uuid.uuid4().hex}')
+    os.symlink(os.path.join(VERSIONS, name), link)
+    os.replace(link, os.path.join(root, CURRENT))
+    prune(root, keep)
+    return final
+
+
+def prune(root: str, keep: int = KEEP_VERSIONS):
+    """Delete all but the newest `keep` published versions, never the live one"""
+    versions = os.path.join(root, VERSIONS)
+    live = current_version(root)
+    names = sorted(name for name in os.listdir(versions) if not name.startswith('.'))
+    for name in names[:-keep] if keep > 0 else names:
+        path = os.path.join(versions, name)
+        if os.path.realpath(path) != live:
+            # Open files (e.g. a mapped chart store) stay readable until closed
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class VersionWatcher:
+    """Calls check() every `interval` seconds on a daemon thread.
+
+    check is expected to compare root/current with what is loaded and
+    reload when it moved; calls are serialized, so a publisher may also
+    call check() directly to make its version live before returning.
+    """
+
+    def __init__(self, check, interval: float = 1.0):
+        self._check = check
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def check(self):
+        with self._lock:
+            return self._check()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._run, name='version-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error: reloading the published version failed: {e}")
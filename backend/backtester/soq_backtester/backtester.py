@@ -1,40 +1,141 @@
 import pandas as pd
 import numpy as np
-import vectorbt as vbt
 import tqdm
-from tabulate import tabulate
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import script
 import importlib
-importlib.reload(script)
 import scipy.stats as stats
-import json
 
-from script import Strategy 
-import plotly.io as pio
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
-import datetime
+# Relative when imported as backtester.soq_backtester.backtester, so the siblings are
+# the same module objects callers import (isinstance checks on RunProfiler and
+# EnginePortfolio depend on it); top-level when run as a script
+try:
+    from . import script
+    from .data_store import OHLCVStore
+    from .analytics import EnginePortfolio
+    from .charts import candlestick_payload, write_charts
+    from .serialization import dumps, loads, records
+    from .checkpoint import load_checkpoint, save_checkpoint
+    from .profiling import NullProfiler, RunProfiler
+    from .storage import CHART_FIELDS, StoragePolicy, memory_report
+    from .artefacts import current_version, publish, staging_dir
+except ImportError:
+    import script
+    from data_store import OHLCVStore
+    from analytics import EnginePortfolio
+    from charts import candlestick_payload, write_charts
+    from serialization import dumps, loads, records
+    from checkpoint import load_checkpoint, save_checkpoint
+    from profiling import NullProfiler, RunProfiler
+    from storage import CHART_FIELDS, StoragePolicy, memory_report
+    from artefacts import current_version, publish, staging_dir
+importlib.reload(script)
+Strategy = script.Strategy
+
+ENGINES = ('numpy', 'pandas')
+
+def target_positions(weights: np.ndarray, value, prices: np.ndarray, current: np.ndarray) -> np.ndarray:
+    nan_index = np.isnan(weights)
+    value -= np.nansum(current[nan_index] * prices[nan_index])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        float_shares = (np.where(weights == 0, np.nan, weights) * value) / np.where(prices == 0, np.nan, prices)
+    float_shares[~np.isfinite(float_shares)] = 0
+
+    # floor for longs and ceil for shorts, i.e. truncate towards zero
+    new_positions = np.trunc(float_shares).astype(np.int64)
+    new_positions[nan_index] = current[nan_index]
+
+    return new_positions
+
+# Per-bar result arrays of a run, filled in place and materialised once at the end
+RESULT_BUFFERS = ('position_buffer', 'signal_buffer', 'portfolio_history', 'cash_history', 'investment_history')
+
+
+def price_matrix(data: pd.DataFrame, field: str, tickers, dtype=np.float64, store=None) -> np.ndarray:
+    """Contiguous (bars x tickers) matrix of one field, from data or, when data lacks it, from store"""
+    if field not in data.columns.get_level_values(1) and store is not None:
+        return store.matrix(field, start=data.index[0], end=data.index[-1], tickers=tickers, dtype=dtype)
+    prices = data.xs(field, level=1, axis=1).reindex(columns=tickers)
+    return np.ascontiguousarray(prices.to_numpy(dtype=dtype))
+
+
+def result_buffers(shape: tuple, policy: StoragePolicy) -> dict:
+    """RESULT_BUFFERS for shape (..., bars, tickers); leading axes stack several runs"""
+    *runs, n_bars, n_tickers = shape
+    runs = tuple(runs)
+    return {
+        'position_buffer': np.zeros(runs + (n_bars, n_tickers), dtype=policy.position_dtype),
+        'signal_buffer': np.full(runs + (max(n_bars - 1, 0), n_tickers), np.nan, dtype=policy.signal_dtype),
+        'portfolio_history': np.full(runs + (n_bars,), np.nan),
+        'cash_history': np.full(runs + (n_bars,), np.nan),
+        'investment_history': np.full(runs + (n_bars,), np.nan),
+    }
+
 
 class Backtester:
-    def __init__(self, data: pd.DataFrame, initial_value: float):
+    def __init__(self, data: pd.DataFrame, initial_value: float, engine: str = 'numpy', strategy=None,
+                 policy: StoragePolicy = None, store=None, prices: tuple = None, buffers: dict = None):
+        """prices, an (open, close) pair of price matrices, and buffers, a dict of
+        RESULT_BUFFERS arrays, let several backtesters over the same data share
+        inputs and write into slices of one allocation (see BatchBacktester).
+        """
+        if engine not in ENGINES:
+            raise ValueError(f'engine must be one of {ENGINES}, got {engine!r}')
+        # policy sets the storage dtypes and which fields stay in memory; fields
+        # it drops are read back from store (an OHLCVStore) at export time
+        self.policy = policy if policy is not None else StoragePolicy()
+        self.store = store
+        dropped = [field for field in CHART_FIELDS if self.policy.fields is not None and field not in self.policy.fields]
+        if dropped and store is None:
+            raise ValueError(f'{self.policy!r} drops {dropped}, which the chart export reads back from store; pass store=')
+        if self.policy.fields is not None:
+            keep = data.columns.get_level_values(1).isin(self.policy.fields)
+            if not keep.all():
+                data = data.loc[:, keep]
         self.data = data
+        self.engine = engine
+        self.strategy = strategy if strategy is not None else Strategy()
+        self.initial_value = initial_value
         self.portfolio_value = initial_value
         self.cash = initial_value
         self.investment = 0.0
         self.current_index = 1
         tickers = data.columns.get_level_values(0).unique()
+        self.tickers = tickers
         self.positions = pd.Series(0, index=tickers)
-        self.all_positions = pd.DataFrame(columns=tickers)
+        self.all_positions = pd.DataFrame(columns=tickers, dtype=self.policy.position_dtype)
         self.tradingState = {}
+        self.traderData = 1
+        self.profiler = NullProfiler()
         self.dates = []
-        self.portfolio_history = []
-        self.cash_history = []
-        self.investment_history = []
-        self.all_signals = pd.DataFrame(columns=tickers)
+        self.all_signals = pd.DataFrame(columns=tickers, dtype=self.policy.signal_dtype)
+
+        # Per-bar result buffers, filled in place by run() and only turned
+        # into DataFrames once at the end
+        if buffers is None:
+            buffers = result_buffers((len(data), len(tickers)), self.policy)
+        for name in RESULT_BUFFERS:
+            setattr(self, name, buffers[name])
+
+        # Contiguous (bars x tickers) price matrices used by the numpy engine,
+        # pivoted once here instead of re-slicing the MultiIndex frame per bar
+        if prices is None:
+            prices = self._price_matrix('open'), self._price_matrix('close')
+        self.open_prices, self.close_prices = prices
+        self.position_vector = self.positions.to_numpy(dtype=np.int64, copy=True)
+
+    def _price_matrix(self, field: str) -> np.ndarray:
+        return price_matrix(self.data, field, self.tickers, self.policy.price_dtype, self.store)
+
+    def _bar_prices(self, prices: np.ndarray, index: int) -> np.ndarray:
+        # Accounting is always float64, whatever dtype the matrices are stored in
+        return prices[index].astype(np.float64, copy=False)
+
+    def memory_report(self) -> dict:
+        return memory_report(self)
 
     def calculate_positions(self, signal: pd.Series, value, open=True) -> pd.Series:
         if (signal < 0).any():
@@ -84,34 +185,253 @@ class Backtester:
         price2 = self.data.xs('open',level=1,axis=1).iloc[index] if new_day else self.data.xs('close',level=1,axis=1).iloc[index]
         return (positions * (price2 - price1)).sum() + self.investment
 
-    def run(self):
-        processed_data = Strategy().process_data(self.data)
-        self.all_positions.loc[self.data.index[0]] = self.positions
-        traderData = 1
-        for i in tqdm.tqdm(range(1, len(self.data))):
-            self.tradingState = {
-                'processed_data': processed_data[:i],
-                'investment': self.investment,
-                'cash': self.cash,
-                'current_timestamp': self.data.index[self.current_index],
-                'traderData': traderData,
-                'positions': self.positions,
-            }
-            signal, traderData = Strategy().get_signals(self.tradingState)
-            if signal is None:
-                raise ValueError(f'For timestamp {self.data.index[self.current_index]}, signal is None')
-            self.investment = self.update_investment(self.positions, new_day=True)
+    def calculate_positions_np(self, signal: pd.Series, value, open=True) -> np.ndarray:
+        if not isinstance(signal, pd.Series):
+            raise TypeError(f'For timestamp {self.data.index[self.current_index]}, signal must be a pandas Series, got {type(signal)}')
+        if not signal.index.equals(self.tickers):
+            signal = signal.reindex(self.tickers)
+        weights = signal.to_numpy(dtype=np.float64)
+        if (weights < 0).any():
+            raise ValueError(f'For timestamp {self.data.index[self.current_index]}, signal contains negative values: {signal[signal < 0]}')
+        if np.nansum(np.abs(weights)) - 1 > 1e-6:
+            raise ValueError(f'For timestamp {self.data.index[self.current_index]} the sum of the abs(signals) must not be greater than 1, got {np.nansum(np.abs(weights))}')
+
+        prices = self._bar_prices(self.open_prices if open else self.close_prices, self.current_index)
+        return target_positions(weights, value, prices, self.position_vector)
+
+    def calculate_cash_np(self, positions: np.ndarray, open=True) -> float:
+        price = self._bar_prices(self.open_prices if open else self.close_prices, self.current_index)
+        return self.portfolio_value - np.nansum(np.abs(positions) * price)
+
+    def update_investment_np(self, positions: np.ndarray, new_day=False) -> float:
+        index = self.current_index
+        price1 = self._bar_prices(self.close_prices, index-1) if new_day else self._bar_prices(self.open_prices, index)
+        price2 = self._bar_prices(self.open_prices, index) if new_day else self._bar_prices(self.close_prices, index)
+        return np.nansum(positions * (price2 - price1)) + self.investment
+
+    def step(self, signal: pd.Series):
+        section = self.profiler.section
+        if self.engine == 'numpy':
+            with section('update_investment'):
+                self.investment = self.update_investment_np(self.position_vector, new_day=True)
             self.portfolio_value = self.investment + self.cash
-            self.positions = self.calculate_positions(signal, self.portfolio_value)
-            self.cash = self.calculate_cash(self.positions)
+            with section('calculate_positions'):
+                self.position_vector = self.calculate_positions_np(signal, self.portfolio_value)
+            with section('bookkeeping'):
+                self.positions = pd.Series(self.position_vector, index=self.tickers, copy=False)
+            with section('calculate_cash'):
+                self.cash = self.calculate_cash_np(self.position_vector)
             self.investment = self.portfolio_value - self.cash
-            self.investment = self.update_investment(self.positions, new_day=False)
+            with section('update_investment'):
+                self.investment = self.update_investment_np(self.position_vector, new_day=False)
+        else:
+            with section('update_investment'):
+                self.investment = self.update_investment(self.positions, new_day=True)
             self.portfolio_value = self.investment + self.cash
-            self.all_positions.loc[self.data.index[i]] = self.positions
-            self.all_signals.loc[self.data.index[i-1]] = signal
-            self.current_index += 1
+            with section('calculate_positions'):
+                self.positions = self.calculate_positions(signal, self.portfolio_value)
+            with section('calculate_cash'):
+                self.cash = self.calculate_cash(self.positions)
+            self.investment = self.portfolio_value - self.cash
+            with section('update_investment'):
+                self.investment = self.update_investment(self.positions, new_day=False)
+        self.portfolio_value = self.investment + self.cash
+
+    def record(self, index: int, signal: pd.Series = None):
+        positions = self.position_vector if self.engine == 'numpy' else self.positions
+        if signal is not None:
+            if not signal.index.equals(self.tickers):
+                signal = signal.reindex(self.tickers)
+            self.signal_buffer[index-1] = signal.to_numpy(dtype=np.float64)
+        if isinstance(positions, pd.Series):
+            positions = positions.reindex(self.tickers).to_numpy()
+        self.position_buffer[index] = positions
+        self.portfolio_history[index] = self.portfolio_value
+        self.cash_history[index] = self.cash
+        self.investment_history[index] = self.investment
+
+    @classmethod
+    def resume(cls, data: pd.DataFrame, checkpoint_path: str, strategy=None,
+               policy: StoragePolicy = None, store=None) -> 'Backtester':
+        """Restore a checkpointed run over data, which must extend the checkpointed bars.
+
+        run() then only processes the bars after the checkpoint. The
+        strategy saved with the checkpoint is used unless one is passed.
+        """
+        state = load_checkpoint(checkpoint_path)
+        n_bars = state['current_index']
+        if list(data.columns.get_level_values(0).unique()) != state['tickers']:
+            raise ValueError('Data tickers differ from the checkpoint')
+        if len(data) < n_bars or not data.index[:n_bars].equals(state['dates']):
+            raise ValueError('Data does not start with the checkpointed bars')
+
+        backtester = cls(data, state['initial_value'], engine=state['engine'],
+                         strategy=strategy if strategy is not None else state['strategy'],
+                         policy=policy, store=store)
+        for name, values in state['history'].items():
+            getattr(backtester, name)[:len(values)] = values
+        backtester.load_state(state)
+        return backtester
+
+    def carry_state(self) -> dict:
+        """The account and strategy state after the last processed bar"""
+        return {
+            'portfolio_value': self.portfolio_value,
+            'cash': self.cash,
+            'investment': self.investment,
+            'traderData': self.traderData,
+            'positions': self.position_buffer[self.current_index - 1].astype(np.int64),
+        }
+
+    def load_state(self, state: dict, current_index: int = None):
+        """Continue from carry_state() output; run() then starts at current_index"""
+        self.portfolio_value = state['portfolio_value']
+        self.cash = state['cash']
+        self.investment = state['investment']
+        self.traderData = state['traderData']
+        self.current_index = state['current_index'] if current_index is None else current_index
+        self.position_vector = state['positions'].astype(np.int64)
+        self.positions = pd.Series(self.position_vector, index=self.tickers)
+
+    def save_checkpoint(self, checkpoint_path: str):
+        save_checkpoint(self, checkpoint_path)
+
+    def materialise_results(self):
+        self.all_positions = pd.DataFrame(self.position_buffer, index=self.data.index, columns=self.tickers)
+        self.all_signals = pd.DataFrame(self.signal_buffer, index=self.data.index[:-1], columns=self.tickers)
+
+    def run(self, progress: bool = True, on_progress=None, profile=False):
+        """Step the strategy through every bar after current_index.
+
+        profile=True (or a RunProfiler) times each part of the loop into
+        self.profiler; export_results then writes its report. Off by default,
+        when the hooks are no-ops.
+        """
+        if profile:
+            self.profiler = profile if isinstance(profile, RunProfiler) else RunProfiler(len(self.data))
+        else:
+            self.profiler = NullProfiler()
+        profiler = self.profiler
+        section = profiler.section
+        strategy = self.strategy
+        processed_data = strategy.process_data(self.data)
+        # Strategies that set `lookback` only see that many trailing bars,
+        # which keeps the per-bar cost independent of history length
+        lookback = getattr(strategy, 'lookback', None)
+        on_bar = getattr(strategy, 'on_bar', None)
+        window = processed_data.to_numpy().view()
+        window.flags.writeable = False
+        # Continues after the last processed bar, which is bar 0 for a fresh run
+        # and the checkpointed bar for a resumed one
+        if self.current_index == 1:
+            self.record(0)
+        profiler.start(root_code=Backtester.run.__code__)
+        try:
+            for i in tqdm.tqdm(range(self.current_index, len(self.data)), disable=not progress):
+                profiler.next_bar(i)
+                start = 0 if lookback is None else max(0, i - lookback)
+                if on_bar is not None:
+                    with section('on_bar'):
+                        on_bar(processed_data.index[i-1], window[i-1])
+                with section('trading_state'):
+                    self.tradingState = {
+                        'processed_data': processed_data[:i] if lookback is None else processed_data.iloc[start:i],
+                        'window': window[start:i],
+                        'investment': self.investment,
+                        'cash': self.cash,
+                        'current_timestamp': self.data.index[self.current_index],
+                        'traderData': self.traderData,
+                        'positions': self.positions,
+                    }
+                with section('get_signals'):
+                    signal, self.traderData = strategy.get_signals(self.tradingState)
+                if signal is None:
+                    raise ValueError(f'For timestamp {self.data.index[self.current_index]}, signal is None')
+                self.step(signal)
+                with section('bookkeeping'):
+                    self.record(i, signal)
+                self.current_index += 1
+                if on_progress is not None:
+                    on_progress(i, len(self.data) - 1)
+        finally:
+            profiler.stop()
+        self.materialise_results()
+
+    def run_vectorized(self, weights: pd.DataFrame):
+        # Records from bar 0 on and starts from the initial account, so it cannot
+        # continue a run() or resume()d backtester the way run() does
+        if self.current_index != 1:
+            raise ValueError(f'run_vectorized needs a fresh Backtester, but bars up to {self.current_index - 1} were already run')
+        # weights follow the all_signals convention: the row for data.index[i-1]
+        # is applied at the open of bar i, and NaN means hold that ticker
+        weights = weights.reindex(index=self.data.index[:-1], columns=self.tickers)
+        W = weights.to_numpy(dtype=np.float64)
+        # Whole-array accounting below needs float64 matrices; compact storage is upcast for the call
+        o = self.open_prices.astype(np.float64, copy=False)
+        c = self.close_prices.astype(np.float64, copy=False)
+        n_bars = len(self.data)
+
+        negative = (W < 0).any(axis=1)
+        if negative.any():
+            row = int(np.argmax(negative))
+            raise ValueError(f'For timestamp {self.data.index[row + 1]}, signal contains negative values: {weights.iloc[row][weights.iloc[row] < 0]}')
+        gross = np.nansum(np.abs(W), axis=1)
+        if (gross - 1 > 1e-6).any():
+            row = int(np.argmax(gross - 1 > 1e-6))
+            raise ValueError(f'For timestamp {self.data.index[row + 1]} the sum of the abs(signals) must not be greater than 1, got {gross[row]}')
+
+        # Positions only change on bars with at least one non-NaN weight, so the
+        # Python-level loop runs over rebalances; every stretch of hold bars in
+        # between is accounted for with whole-array operations
+        rebalances = np.flatnonzero(~np.isnan(W).all(axis=1)) + 1
+        self.record(0)
+        positions = self.position_vector
+        pv, cash = self.portfolio_value, self.cash
+        bounds = np.append(rebalances, n_bars)
+        start = 1
+        for i in bounds:
+            if i > start:
+                # hold bars start..i-1 with constant positions
+                rows = slice(start, i)
+                gaps = np.nansum(positions * (o[rows] - c[start-1:i-1]), axis=1)
+                intraday = np.nansum(positions * (c[rows] - o[rows]), axis=1)
+                steps = np.empty(2 * (i - start))
+                steps[0::2], steps[1::2] = gaps, intraday
+                values = pv + np.cumsum(steps)
+                open_values, close_values = values[0::2], values[1::2]
+                cash_values = open_values - np.nansum(np.abs(positions) * o[rows], axis=1)
+                self.position_buffer[rows] = positions
+                self.portfolio_history[rows] = close_values
+                self.cash_history[rows] = cash_values
+                self.investment_history[rows] = close_values - cash_values
+                pv, cash = close_values[-1], cash_values[-1]
+            if i == n_bars:
+                break
+            pv += np.nansum(positions * (o[i] - c[i-1]))
+            positions = target_positions(W[i-1], pv, o[i], positions)
+            cash = pv - np.nansum(np.abs(positions) * o[i])
+            pv += np.nansum(positions * (c[i] - o[i]))
+            self.position_buffer[i] = positions
+            self.portfolio_history[i] = pv
+            self.cash_history[i] = cash
+            self.investment_history[i] = pv - cash
+            start = i + 1
+
+        self.signal_buffer[:] = W
+        self.position_vector = positions
+        self.positions = pd.Series(positions, index=self.tickers, copy=False)
+        self.portfolio_value, self.cash = pv, cash
+        self.investment = pv - cash
+        self.current_index = n_bars
+        self.materialise_results()
+
+    def portfolio(self) -> EnginePortfolio:
+        return EnginePortfolio(self)
 
     def vectorbt_run(self):
+        # Re-simulates the run through vectorbt; only needed to cross-check portfolio()
+        import vectorbt as vbt
+
         open_prices = self.data.xs('open', level=1, axis=1).loc[self.all_positions.index, self.all_positions.columns]
         close_prices = self.data.xs('close', level=1, axis=1).loc[self.all_positions.index, self.all_positions.columns]
         
@@ -122,7 +442,7 @@ class Backtester:
             close=close_prices,
             size=order_size,
             price=open_prices,
-            init_cash=initial_value,
+            init_cash=self.initial_value,
             freq='1D',
             cash_sharing=True,
             ffill_val_price=True,
@@ -131,66 +451,110 @@ class Backtester:
         )
         return portfolio
     
-    def export_results(self, portfolio, save_path="frontend_data"):
+    def export_results(self, portfolio, save_path="frontend_data", workers: int = None, since: int = None):
+        """Write the frontend files for this run into save_path.
+
+        since is the number of bars an earlier export of the same run already
+        wrote to save_path (e.g. the checkpoint length before resume()). The
+        per-bar CSV and JSON files are then appended to instead of rewritten.
+        Charts, trades, the histogram and the metrics cover the whole history
+        (and the charts' compressed variants cannot be appended to), so they
+        are always rebuilt.
+        """
         os.makedirs(save_path, exist_ok=True)
-        charts_dir = os.path.join(save_path, "charts")
         plots_dir = os.path.join(save_path, "plots")
-        os.makedirs(charts_dir, exist_ok=True)
         os.makedirs(plots_dir, exist_ok=True)
+        append = since is not None and all(
+            os.path.exists(os.path.join(save_path, name))
+            for name in ("portfolio_summary.json", "portfolio_summary.csv", "portfolio.csv", "signals.csv")
+        )
+        rows = slice(since, None) if append else slice(None)
 
         # 1. Portfolio summary data
-        equity = portfolio.value()
-        returns = equity.pct_change().fillna(0)
-        cum_max = equity.cummax()
-        drawdown = (equity - cum_max) / cum_max
-
-        portfolio_summary = pd.DataFrame({
-            'date': equity.index,
-            'equity': equity.values,
-            'returns': returns.values,
-            'drawdown': drawdown.values
-        })
-        portfolio_summary.to_csv(os.path.join(save_path, "portfolio_summary.csv"), index=False)
+        portfolio_summary = self.build_portfolio_summary(portfolio)
+        self._write_csv(portfolio_summary.iloc[rows], os.path.join(save_path, "portfolio_summary.csv"), append, index=False)
         
         # Save as JSON for frontend
-        portfolio_json = portfolio_summary.to_dict(orient='records')
-        with open(os.path.join(save_path, "portfolio_summary.json"), 'w') as f:
-            json.dump(portfolio_json, f, default=str)  # default=str handles datetime conversion
+        portfolio_json = records(portfolio_summary.iloc[rows])
+        if append:
+            self._append_json_records(os.path.join(save_path, "portfolio_summary.json"), portfolio_json)
+        else:
+            with open(os.path.join(save_path, "portfolio_summary.json"), 'wb') as f:
+                f.write(dumps(portfolio_json))  # Timestamps are written as ISO 8601
 
         # 2. Export portfolio value breakdown
         df = pd.concat([portfolio.value(), portfolio.asset_value(), portfolio.cash()], axis=1)
         df.columns = ['portfolio', 'investment', 'cash']
-        df.to_csv(os.path.join(save_path, "portfolio.csv"))
+        self._write_csv(df.iloc[rows], os.path.join(save_path, "portfolio.csv"), append)
         
-        # 3. Save signals
-        self.all_signals.to_csv(os.path.join(save_path, "signals.csv"))
+        # 3. Save signals (one row per bar except the last)
+        signal_rows = slice(since - 1, None) if append else slice(None)
+        self._write_csv(self.all_signals.iloc[signal_rows], os.path.join(save_path, "signals.csv"), append)
+        if isinstance(portfolio, EnginePortfolio):
+            # Open trades are re-marked on every bar, so this is always rewritten
+            portfolio.trades.to_csv(os.path.join(save_path, "trades.csv"), index=False)
         
-        # 4. Generate candlestick data for each ticker
-        tickers = self.data.columns.get_level_values(0).unique()
-        for ticker in tqdm.tqdm(tickers, desc="Exporting ticker charts"):
-            ticker_data = self.get_candlestick_data(ticker)
-            with open(os.path.join(charts_dir, f"{ticker}.json"), 'w') as f:
-                json.dump(self.clean_for_json(ticker_data), f, default=str)
+        # 4. Generate candlestick data for each ticker, all in one indexed file
+        dates, ohlc, positions = self.chart_arrays()
+        write_charts(save_path, self.tickers, dates, ohlc, positions, workers=workers)
 
 
         # NEW: Generate returns histogram
         returns_histogram = self.generate_returns_histogram(portfolio_summary['returns'])
-        with open(os.path.join(save_path, "returns_histogram.json"), 'w') as f:
-            json.dump(returns_histogram, f)
+        with open(os.path.join(save_path, "returns_histogram.json"), 'wb') as f:
+            f.write(dumps(returns_histogram))
         
         # Also save as CSV
         pd.DataFrame(returns_histogram).to_csv(os.path.join(save_path, "returns_histogram.csv"), index=False)
         
         # NEW: Generate performance metrics
         performance_metrics = self.calculate_performance_metrics(portfolio, portfolio_summary)
-        safe_metrics = self.clean_for_json(performance_metrics)
-        with open(os.path.join(save_path, "performance_metrics.json"), 'w') as f:
-            json.dump(safe_metrics, f, indent=2, allow_nan=False)
+        with open(os.path.join(save_path, "performance_metrics.json"), 'wb') as f:
+            f.write(dumps(performance_metrics, indent=True))  # NaN and inf become null
 
 
+        # Timing report and folded stacks when run(profile=True) was used
+        if self.profiler.enabled:
+            self.profiler.write(save_path)
+
         print(f"📁 Results exported to `{save_path}/`.")
         return portfolio_summary
 
+    @staticmethod
+    def _write_csv(frame: pd.DataFrame, path: str, append: bool, index: bool = True):
+        if append:
+            frame.to_csv(path, mode='a', header=False, index=index)
+        else:
+            frame.to_csv(path, index=index)
+
+    @staticmethod
+    def _append_json_records(path: str, records: list):
+        # Splice the new records in before the closing bracket, producing the
+        # same bytes dumps would have written for the whole list
+        if not records:
+            return
+        body = dumps(records)[1:-1]
+        with open(path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b']':
+                raise ValueError(f'{path} is not a JSON list')
+            f.seek(-1, os.SEEK_END)
+            empty = f.tell() == 1
+            f.write((b'' if empty else b',') + body + b']')
+
+    def build_portfolio_summary(self, portfolio) -> pd.DataFrame:
+        equity = portfolio.value()
+        returns = equity.pct_change().fillna(0)
+        cum_max = equity.cummax()
+        drawdown = (equity - cum_max) / cum_max
+
+        return pd.DataFrame({
+            'date': equity.index,
+            'equity': equity.values,
+            'returns': returns.values,
+            'drawdown': drawdown.values
+        })
+
     def generate_returns_histogram(self, returns_series: pd.Series, bins: int = 30) -> list:
         returns = returns_series.dropna()
         counts, bin_edges = np.histogram(returns, bins=bins)
@@ -206,58 +570,26 @@ class Backtester:
         return histogram
 
 
+    def chart_arrays(self):
+        # Weekday bars only, as (dates, bars x tickers x OHLC, bars x tickers positions)
+        index = pd.to_datetime(self.data.index)
+        mask = index.weekday < 5
+        dates = index[mask].strftime("%Y-%m-%d").tolist()
+        ohlc = np.stack([
+            self.open_prices[mask],
+            self._price_matrix('high')[mask],
+            self._price_matrix('low')[mask],
+            self.close_prices[mask],
+        ], axis=2)
+        # float32 prices stay float32; dumps writes them in shortest form (101.25, not 101.25000762939453)
+        return dates, ohlc, self.position_buffer[mask]
+
     def get_candlestick_data(self, ticker: str) -> dict:
-        ohlcv = self.data[ticker][["open", "high", "low", "close"]].copy()
-        ohlcv.index = pd.to_datetime(ohlcv.index)
-        pos = self.all_positions[ticker].reindex(ohlcv.index).ffill().fillna(0)
-        
-        # Remove weekends
-        mask = ohlcv.index.weekday < 5
-        ohlcv = ohlcv.loc[mask]
-        pos = pos.loc[mask]
-        
-        # Create dataframe with all data
-        df = ohlcv.assign(position=pos)
-        df["action"] = "hold"
-        df["dpos"] = df["position"].diff().fillna(df["position"])
-        
-        # Identify buy/sell actions
-        df.loc[df["dpos"] > 0, "action"] = "buy"
-        df.loc[df["dpos"] < 0, "action"] = "sell"
-        
-        # Identify holding periods
-        df["holding"] = df["position"] != 0
-        df["grp"] = (df["holding"] != df["holding"].shift(fill_value=False)).cumsum()
-        
-        holdings = []
-        for _, sub in df.groupby("grp"):
-            if sub["holding"].iat[0]:
-                holdings.append({
-                    "start": sub.index[0].strftime("%Y-%m-%d"),
-                    "end": sub.index[-1].strftime("%Y-%m-%d"),
-                    "position": sub["position"].mean()
-                })
-        
-        # Convert to frontend-friendly format
-        data = []
-        for date, row in df.iterrows():
-            data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "open": row["open"],
-                "high": row["high"],
-                "low": row["low"],
-                "close": row["close"],
-                "position": row["position"],
-                "action": row["action"]
-            })
-        
-        return {
-            "ticker": ticker,
-            "data": data,
-            "holdings": holdings
-        }
+        dates, ohlc, positions = self.chart_arrays()
+        j = self.tickers.get_loc(ticker)
+        return candlestick_payload(ticker, dates, ohlc[:, j], positions[:, j])
     
-    def calculate_performance_metrics(self, portfolio, portfolio_summary):
+    def compute_metrics(self, portfolio, portfolio_summary) -> dict:
         # Get portfolio statistics
         stats_df = portfolio.stats().to_frame(name='Value').reset_index()
         stats_df.columns = ['Metric', 'Value']
@@ -295,6 +627,11 @@ class Backtester:
             metrics['var_95'] = 0
             metrics['cvar_95'] = 0
 
+        return metrics
+
+    def calculate_performance_metrics(self, portfolio, portfolio_summary):
+        metrics = self.compute_metrics(portfolio, portfolio_summary)
+
         # Format metrics for frontend
         formatted_metrics = [
             {
@@ -371,18 +708,47 @@ class Backtester:
         
         return formatted_metrics
 
-    def clean_for_json(self, obj):
-        if isinstance(obj, float) and (np.isnan(obj) or np.isinf(obj)):
-            return None
-        if isinstance(obj, dict):
-            return {k: self.clean_for_json(v) for k, v in obj.items()}
-        if isinstance(obj, list):
-            return [self.clean_for_json(v) for v in obj]
-        return obj
-
 
 # ... (keep all imports and class definition the same) ...
 
+def run_incremental(data: pd.DataFrame, save_path: str, checkpoint_path: str, initial_value: float = 200000.0,
+                    progress: bool = True, workers: int = None) -> Backtester:
+    """Run data, export it as a new version of save_path and checkpoint the run.
+
+    With a checkpoint from an earlier call only the bars added since are
+    simulated, and the per-bar files are appended to a copy of the live
+    version when that version ends exactly at the checkpoint; otherwise
+    the whole export is rewritten.
+    """
+    since = None
+    if os.path.exists(checkpoint_path):
+        backtester = Backtester.resume(data, checkpoint_path)
+        since = backtester.current_index
+    else:
+        backtester = Backtester(data, initial_value)
+    live = current_version(save_path)
+    if since is not None:
+        # Appending is only valid onto an export that ends exactly at the checkpoint
+        summary_path = os.path.join(live, "portfolio_summary.json") if live else None
+        if summary_path is None or not os.path.exists(summary_path):
+            since = None
+        else:
+            with open(summary_path, 'rb') as f:
+                if len(loads(f.read())) != since:
+                    since = None
+    backtester.run(progress=progress)
+    pf = backtester.portfolio()
+    # Exported beside the live version and published by flipping save_path/current;
+    # an incremental export appends to a copy, never to the files being served
+    output_dir = staging_dir(save_path, base=live if since is not None else None)
+    backtester.export_results(pf, save_path=output_dir, since=since, workers=workers)
+    publish(save_path, output_dir)
+    # Only after the publish: a checkpoint ahead of the live export would make the
+    # next run append from the wrong bar and drop the rows in between
+    backtester.save_checkpoint(checkpoint_path)
+    return backtester
+
+
 if __name__ == "__main__":
     # Get the directory of the current script
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -394,21 +760,14 @@ if __name__ == "__main__":
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"Data file not found at: {data_path}")
     
-    # Load the data
-    data = pd.read_csv(
-        data_path,
-        index_col=0, header=[0,1], parse_dates=True
-    )[4500:]
-
-    tickers = data.columns.get_level_values(0).unique()[100:200]
-    data = data.loc[:, data.columns.get_level_values(0).isin(tickers)]
-
-    initial_value = 200000.0
-    backtester = Backtester(data, initial_value)
-    backtester.run()
-    pf = backtester.vectorbt_run()
-    
+    # Load the data through the columnar cache; the CSV is only parsed when it changes
+    store = OHLCVStore.from_csv(data_path)
+    data = store.load(start=store.dates[4500], tickers=store.tickers[100:200])
+
     # FIX: Change save path to be outside the backtester directory
     save_path = os.path.join(script_dir, "..", "..", "data", "frontend_data")
     os.makedirs(save_path, exist_ok=True)
-    backtester.export_results(pf, save_path=save_path)
\ No newline at end of file
+
+    # With a checkpoint from the previous run only the bars added since are simulated
+    checkpoint_path = os.path.join(script_dir, "..", "..", "data", "checkpoint")
+    run_incremental(data, save_path, checkpoint_path)
@@ -0,0 +1,186 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import tqdm
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .backtester import RESULT_BUFFERS, Backtester, price_matrix, result_buffers
+    from .storage import StoragePolicy
+except ImportError:
+    from backtester import RESULT_BUFFERS, Backtester, price_matrix, result_buffers
+    from storage import StoragePolicy
+
+
+def held_value(weights: np.ndarray, prices: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Per-row value of the positions a NaN weight leaves untouched.
+
+    Sums exactly as target_positions does for a single row (over the NaN
+    columns only), so batched and separate runs round identically.
+    """
+    nan_index = np.isnan(weights)
+    held = np.zeros(len(weights))
+    all_nan = nan_index.all(axis=1)
+    held[all_nan] = np.nansum(current[all_nan] * prices, axis=1)
+    for row in np.flatnonzero(nan_index.any(axis=1) & ~all_nan):
+        mask = nan_index[row]
+        held[row] = np.nansum(current[row, mask] * prices[mask])
+    return held
+
+
+def target_positions_batch(weights: np.ndarray, values: np.ndarray, prices: np.ndarray,
+                           current: np.ndarray) -> np.ndarray:
+    """target_positions for (strategies x tickers) weights and current positions at once"""
+    nan_index = np.isnan(weights)
+    values = values - held_value(weights, prices, current)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        float_shares = (np.where(weights == 0, np.nan, weights) * values[:, None]) / np.where(prices == 0, np.nan, prices)
+    float_shares[~np.isfinite(float_shares)] = 0
+
+    # floor for longs and ceil for shorts, i.e. truncate towards zero
+    new_positions = np.trunc(float_shares).astype(np.int64)
+    new_positions[nan_index] = current[nan_index]
+
+    return new_positions
+
+
+class BatchBacktester:
+    """Steps several strategies through the same data in one pass.
+
+    Each bar asks every strategy for its signal and then does the accounting
+    for all of them with (strategies x tickers) array operations. After
+    run(), backtesters[s] holds strategy s's results exactly as a separate
+    numpy-engine Backtester(data, initial_value, strategy=strategies[s])
+    would, so portfolio(), compute_metrics and export_results work as usual.
+    """
+
+    def __init__(self, data: pd.DataFrame, initial_value: float, strategies: list):
+        self.data = data
+        self.initial_value = initial_value
+        self.strategies = list(strategies)
+
+        # Price matrices are pivoted once and shared by every member
+        self.tickers = data.columns.get_level_values(0).unique()
+        self.open_prices = price_matrix(data, 'open', self.tickers)
+        self.close_prices = price_matrix(data, 'close', self.tickers)
+
+        # Strategy-major so each member's buffers are contiguous views
+        buffers = result_buffers((len(self.strategies), len(data), len(self.tickers)), StoragePolicy())
+        for name in RESULT_BUFFERS:
+            setattr(self, name, buffers[name])
+
+        self.backtesters = [
+            Backtester(data, initial_value, engine='numpy', strategy=strategy,
+                       prices=(self.open_prices, self.close_prices),
+                       buffers={name: getattr(self, name)[s] for name in RESULT_BUFFERS})
+            for s, strategy in enumerate(self.strategies)
+        ]
+
+    def _signal_weights(self, s: int, signal, index: int) -> np.ndarray:
+        timestamp = self.data.index[index]
+        if signal is None:
+            raise ValueError(f'Strategy {s}: for timestamp {timestamp}, signal is None')
+        if not isinstance(signal, pd.Series):
+            raise TypeError(f'Strategy {s}: for timestamp {timestamp}, signal must be a pandas Series, got {type(signal)}')
+        if not signal.index.equals(self.tickers):
+            signal = signal.reindex(self.tickers)
+        return signal.to_numpy(dtype=np.float64)
+
+    def _check_weights(self, weights: np.ndarray, index: int):
+        timestamp = self.data.index[index]
+        negative = (weights < 0).any(axis=1)
+        if negative.any():
+            s = int(np.argmax(negative))
+            signal = pd.Series(weights[s], index=self.tickers)
+            raise ValueError(f'Strategy {s}: for timestamp {timestamp}, signal contains negative values: {signal[signal < 0]}')
+        gross = np.nansum(np.abs(weights), axis=1)
+        if (gross - 1 > 1e-6).any():
+            s = int(np.argmax(gross - 1 > 1e-6))
+            raise ValueError(f'Strategy {s}: for timestamp {timestamp} the sum of the abs(signals) must not be greater than 1, got {gross[s]}')
+
+    def run(self, progress: bool = True):
+        n_strategies, n_bars = len(self.strategies), len(self.data)
+        o, c = self.open_prices, self.close_prices
+
+        processed = [strategy.process_data(self.data) for strategy in self.strategies]
+        lookbacks = [getattr(strategy, 'lookback', None) for strategy in self.strategies]
+        on_bars = [getattr(strategy, 'on_bar', None) for strategy in self.strategies]
+        windows = []
+        for processed_data in processed:
+            window = processed_data.to_numpy().view()
+            window.flags.writeable = False
+            windows.append(window)
+
+        positions = np.zeros((n_strategies, len(self.tickers)), dtype=np.int64)
+        cash = np.full(n_strategies, float(self.initial_value))
+        investment = np.zeros(n_strategies)
+        portfolio_value = cash.copy()
+        trader_data = [1] * n_strategies
+        position_series = [pd.Series(0, index=self.tickers) for _ in range(n_strategies)]
+
+        self.position_buffer[:, 0] = positions
+        self.portfolio_history[:, 0] = portfolio_value
+        self.cash_history[:, 0] = cash
+        self.investment_history[:, 0] = investment
+
+        weights = np.empty((n_strategies, len(self.tickers)))
+        for i in tqdm.tqdm(range(1, n_bars), disable=not progress):
+            timestamp = self.data.index[i]
+            # Strategies whose process_data returned the same frame (e.g. the
+            # data itself) and that use the same lookback share one slice
+            slices = {}
+            for s, strategy in enumerate(self.strategies):
+                lookback = lookbacks[s]
+                start = 0 if lookback is None else max(0, i - lookback)
+                if on_bars[s] is not None:
+                    on_bars[s](processed[s].index[i-1], windows[s][i-1])
+                key = (id(processed[s]), start)
+                if key not in slices:
+                    slices[key] = processed[s][:i] if lookback is None else processed[s].iloc[start:i]
+                trading_state = {
+                    'processed_data': slices[key],
+                    'window': windows[s][start:i],
+                    'investment': investment[s],
+                    'cash': cash[s],
+                    'current_timestamp': timestamp,
+                    'traderData': trader_data[s],
+                    'positions': position_series[s],
+                }
+                signal, trader_data[s] = strategy.get_signals(trading_state)
+                weights[s] = self._signal_weights(s, signal, i)
+
+            self._check_weights(weights, i)
+
+            # Same operation order as Backtester.step, vectorised across strategies
+            previous = positions
+            investment = np.nansum(positions * (o[i] - c[i-1]), axis=1) + investment
+            portfolio_value = investment + cash
+            positions = target_positions_batch(weights, portfolio_value, o[i], positions)
+            cash = portfolio_value - np.nansum(np.abs(positions) * o[i], axis=1)
+            investment = portfolio_value - cash
+            investment = np.nansum(positions * (c[i] - o[i]), axis=1) + investment
+            portfolio_value = investment + cash
+
+            # Only strategies that traded get a new positions Series
+            for s in np.flatnonzero((positions != previous).any(axis=1)):
+                position_series[s] = pd.Series(positions[s], index=self.tickers, copy=False)
+            self.signal_buffer[:, i-1] = weights
+            self.position_buffer[:, i] = positions
+            self.portfolio_history[:, i] = portfolio_value
+            self.cash_history[:, i] = cash
+            self.investment_history[:, i] = investment
+
+        for s, member in enumerate(self.backtesters):
+            member.position_vector = positions[s].copy()
+            member.positions = pd.Series(member.position_vector, index=self.tickers, copy=False)
+            member.cash = cash[s]
+            member.investment = investment[s]
+            member.portfolio_value = portfolio_value[s]
+            member.traderData = trader_data[s]
+            member.current_index = n_bars
+            member.materialise_results()
+        return self.backtesters
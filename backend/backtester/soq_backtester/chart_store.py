@@ -0,0 +1,93 @@
+"""Every ticker's chart in one memory-mapped file.
+
+charts.bin holds, per ticker, the serialized chart and its precompressed
+variants back to back. charts.index.json maps each ticker to the offset,
+length and ETag of every variant, in export order. The index is written
+last and atomically, so a store is either complete or absent.
+"""
+import hashlib
+import json
+import mmap
+import os
+from datetime import datetime, timezone
+
+STORE_FILE = 'charts.bin'
+INDEX_FILE = 'charts.index.json'
+INDEX_VERSION = 1
+
+
+class ChartStoreWriter:
+    """Appends chart variants to charts.bin in save_path; close() writes the index"""
+
+    def __init__(self, save_path: str):
+        self.save_path = save_path
+        self._file = open(os.path.join(save_path, STORE_FILE), 'wb')
+        self._index = {}
+
+    def add(self, ticker: str, variants: dict):
+        """variants maps a Content-Encoding ('identity', 'gzip', 'br') to its bytes"""
+        entry = {}
+        for encoding, body in variants.items():
+            entry[encoding] = [self._file.tell(), len(body), hashlib.sha1(body).hexdigest()]
+            self._file.write(body)
+        self._index[ticker] = entry
+
+    def close(self):
+        self._file.close()
+        path = os.path.join(self.save_path, INDEX_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'tickers': self._index}, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class ChartStore:
+    """Read side of a chart store: one mmap, slices served by ticker and encoding"""
+
+    def __init__(self, save_path: str):
+        with open(os.path.join(save_path, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f'Unsupported chart index version {index.get("version")}')
+        self.path = os.path.join(save_path, STORE_FILE)
+        self._index = index['tickers']
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # An export without tickers leaves an empty file, which cannot be mapped
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        self.last_modified = datetime.fromtimestamp(stat.st_mtime_ns / 1e9, tz=timezone.utc)
+
+    @classmethod
+    def open(cls, save_path: str):
+        """The store in save_path, or None when that export has no (complete) store"""
+        if not os.path.exists(os.path.join(save_path, INDEX_FILE)):
+            return None
+        return cls(save_path)
+
+    @property
+    def tickers(self) -> list:
+        return list(self._index)
+
+    def __contains__(self, ticker):
+        return ticker in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def encodings(self, ticker: str) -> list:
+        return list(self._index[ticker])
+
+    def etag(self, ticker: str, encoding: str = 'identity') -> str:
+        return self._index[ticker][encoding][2]
+
+    def get(self, ticker: str, encoding: str = 'identity') -> bytes:
+        offset, length, _ = self._index[ticker][encoding]
+        return self._map[offset:offset + length]
@@ -0,0 +1,107 @@
+import gzip
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .chart_store import ChartStoreWriter
+    from .serialization import dumps
+except ImportError:
+    from chart_store import ChartStoreWriter
+    from serialization import dumps
+
+# Chart files store the action as an index into this list
+ACTIONS = ['hold', 'buy', 'sell']
+
+# Per-worker state set up once by _init_chart_worker
+_WORKER = {}
+
+
+def candlestick_payload(ticker: str, dates: list, ohlc: np.ndarray, positions: np.ndarray) -> dict:
+    """Columnar chart data for one ticker from (bars x 4) open/high/low/close and the per-bar positions.
+
+    The price, position and action columns are NumPy arrays; serialization.dumps
+    writes them directly, with missing prices as null.
+    """
+    columns = np.ascontiguousarray(ohlc.T)
+    dpos = np.diff(positions, prepend=0)
+    actions = np.where(dpos > 0, 1, np.where(dpos < 0, 2, 0))
+
+    # Holding periods are the runs where the position is non-zero
+    holding = np.concatenate(([False], positions != 0, [False]))
+    edges = np.flatnonzero(holding[1:] != holding[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    sums = np.add.reduceat(positions, starts) if len(starts) else []
+    holdings = [
+        {"start": dates[start], "end": dates[end - 1], "position": total / (end - start)}
+        for start, end, total in zip(starts.tolist(), ends.tolist(), np.asarray(sums).tolist())
+    ]
+
+    return {
+        "ticker": ticker,
+        "date": dates,
+        "open": columns[0],
+        "high": columns[1],
+        "low": columns[2],
+        "close": columns[3],
+        "position": positions,
+        "action": actions,
+        "actions": ACTIONS,
+        "holdings": holdings
+    }
+
+
+def precompressed(body: bytes) -> dict:
+    """body plus its gzip (and brotli when installed) encodings, keyed by Content-Encoding"""
+    variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=9)
+    return variants
+
+
+def encode_chart(ticker: str, dates: list, ohlc: np.ndarray, positions: np.ndarray) -> dict:
+    return precompressed(dumps(candlestick_payload(ticker, dates, ohlc, positions)))
+
+
+def _init_chart_worker(dates):
+    _WORKER['dates'] = dates
+
+
+def _encode_chart_task(task):
+    ticker, ohlc, positions = task
+    return ticker, encode_chart(ticker, _WORKER['dates'], ohlc, positions)
+
+
+def write_charts(save_path: str, tickers, dates: list, ohlc: np.ndarray, positions: np.ndarray,
+                 workers: int = None) -> None:
+    """Write the chart store (charts.bin and its index) for every ticker into save_path.
+
+    ohlc is (bars x tickers x 4) and positions is (bars x tickers). With
+    workers=1 everything runs in this process, otherwise the JSON encoding
+    and compression are spread over a process pool and this process
+    appends the results to the store in ticker order.
+    """
+    tasks = (
+        (ticker, np.ascontiguousarray(ohlc[:, j]), np.ascontiguousarray(positions[:, j]))
+        for j, ticker in enumerate(tickers)
+    )
+    with ChartStoreWriter(save_path) as store:
+        if workers == 1 or len(tickers) < 2:
+            _init_chart_worker(dates)
+            for task in tasks:
+                store.add(*_encode_chart_task(task))
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_chart_worker,
+                                 initargs=(dates,)) as pool:
+            for ticker, variants in pool.map(_encode_chart_task, tasks, chunksize=16):
+                store.add(ticker, variants)
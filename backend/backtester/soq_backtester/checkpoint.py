@@ -0,0 +1,54 @@
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+HISTORY_FILE = 'history.npz'
+STATE_FILE = 'state.pkl'
+
+# Per-bar buffers; signal_buffer has one row fewer than the others
+HISTORY_FIELDS = ('position_buffer', 'signal_buffer', 'portfolio_history', 'cash_history', 'investment_history')
+
+
+def save_checkpoint(backtester, path: str) -> None:
+    """Write everything a later run needs to carry on after backtester's last bar.
+
+    The directory is built next to path and swapped in whole, so an
+    interrupted save leaves the previous checkpoint intact.
+    """
+    n_bars = backtester.current_index
+    tmp_dir = path + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    history = {name: getattr(backtester, name)[:n_bars] for name in HISTORY_FIELDS}
+    history['signal_buffer'] = backtester.signal_buffer[:n_bars - 1]
+    history['dates'] = backtester.data.index[:n_bars].values.astype('datetime64[ns]')
+    np.savez(os.path.join(tmp_dir, HISTORY_FILE), **history)
+
+    state = {
+        **backtester.carry_state(),
+        'tickers': list(backtester.tickers),
+        'index_name': backtester.data.index.name,
+        'engine': backtester.engine,
+        'initial_value': backtester.initial_value,
+        'current_index': n_bars,
+        # Strategies may carry rolling state built up by on_bar
+        'strategy': backtester.strategy,
+    }
+    with open(os.path.join(tmp_dir, STATE_FILE), 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_dir, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    with open(os.path.join(path, STATE_FILE), 'rb') as f:
+        state = pickle.load(f)
+    with np.load(os.path.join(path, HISTORY_FILE)) as history:
+        state['history'] = {name: history[name] for name in HISTORY_FIELDS}
+        state['dates'] = pd.DatetimeIndex(history['dates'], name=state['index_name'])
+    return state
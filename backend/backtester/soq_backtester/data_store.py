@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+META_FILE = 'meta.json'
+DATES_FILE = 'dates.npy'
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path: str) -> dict:
+    stat = os.stat(path)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def convert_csv(csv_path: str, cache_dir: str) -> None:
+    """Parse the multi-level OHLCV CSV once and write one memory-mappable .npy per field"""
+    fingerprint = source_fingerprint(csv_path)
+    data = pd.read_csv(csv_path, index_col=0, header=[0, 1], parse_dates=True)
+
+    tickers = data.columns.get_level_values(0).unique()
+    fields = data.columns.get_level_values(1).unique()
+
+    # Unique per conversion, so two processes converting the same CSV never share a directory
+    tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(cache_dir) + '.tmp-', dir=os.path.dirname(os.path.abspath(cache_dir)))
+
+    np.save(os.path.join(tmp_dir, DATES_FILE), data.index.values.astype('datetime64[ns]'))
+    for field in fields:
+        # Stored as (tickers x bars) so each ticker's history is contiguous on disk
+        values = data.xs(field, level=1, axis=1).reindex(columns=tickers).to_numpy(dtype=np.float64)
+        np.save(os.path.join(tmp_dir, f'{field}.npy'), np.ascontiguousarray(values.T))
+
+    meta = {
+        **fingerprint,
+        'source_sha1': file_sha1(csv_path),
+        'index_name': data.index.name,
+        'tickers': list(tickers),
+        'fields': list(fields),
+        'columns': [list(col) for col in data.columns],
+    }
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # A concurrent conversion of the same CSV got there first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not cache_is_fresh(csv_path, cache_dir):
+            raise
+
+
+def cached_source_sha1(csv_path: str, cache_dir: str = None):
+    """SHA-1 of csv_path as recorded by its cache, or None when the cache is missing or may be stale.
+
+    Only stats the CSV, never reads it; raises OSError when the CSV is missing.
+    """
+    cache_dir = cache_dir or csv_path + '.cache'
+    fingerprint = source_fingerprint(csv_path)
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (meta['source_size'], meta['source_mtime_ns']) != (fingerprint['source_size'], fingerprint['source_mtime_ns']):
+        return None
+    return meta['source_sha1']
+
+
+def cache_is_fresh(csv_path: str, cache_dir: str) -> bool:
+    meta_path = os.path.join(cache_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    fingerprint = source_fingerprint(csv_path)
+    if fingerprint['source_size'] != meta['source_size']:
+        return False
+    if fingerprint['source_mtime_ns'] == meta['source_mtime_ns']:
+        return True
+
+    # Touched but possibly unchanged: only rebuild if the content differs
+    if file_sha1(csv_path) != meta['source_sha1']:
+        return False
+    meta.update(fingerprint)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return True
+
+
+class OHLCVStore:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(cache_dir, DATES_FILE)), name=self.meta['index_name'])
+        self.tickers = pd.Index(self.meta['tickers'])
+        self.fields = list(self.meta['fields'])
+        self._ticker_pos = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._arrays = {}
+
+    @classmethod
+    def from_csv(cls, csv_path: str, cache_dir: str = None) -> 'OHLCVStore':
+        """Open the cache for csv_path, converting the CSV first if it is missing or stale"""
+        cache_dir = cache_dir or csv_path + '.cache'
+        if not cache_is_fresh(csv_path, cache_dir):
+            convert_csv(csv_path, cache_dir)
+        return cls(cache_dir)
+
+    def field(self, field: str) -> np.ndarray:
+        if field not in self._arrays:
+            self._arrays[field] = np.load(os.path.join(self.cache_dir, f'{field}.npy'), mmap_mode='r')
+        return self._arrays[field]
+
+    def _bounds(self, start, end) -> tuple:
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        last = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return first, last
+
+    def _columns(self, tickers, fields) -> list:
+        selected = set(self.tickers if tickers is None else tickers)
+        wanted = set(self.fields if fields is None else fields)
+        # Keep the CSV's original column order, as data.loc[:, isin(tickers)] would
+        return [(t, f) for t, f in self.meta['columns'] if t in selected and f in wanted]
+
+    def _fill(self, values: np.ndarray, columns: list, first: int, last: int) -> None:
+        for field in self.fields:
+            out_cols = [j for j, (_, f) in enumerate(columns) if f == field]
+            if not out_cols:
+                continue
+            rows = [self._ticker_pos[columns[j][0]] for j in out_cols]
+            values[:, out_cols] = self.field(field)[rows, first:last].T
+
+    def load(self, start=None, end=None, tickers=None, fields=None, dtype=np.float64,
+             chunk_bars: int = None) -> pd.DataFrame:
+        """Return the same frame as read_csv(...) sliced to [start, end] and tickers, reading only that block.
+
+        fields and dtype narrow what is materialised (e.g. only open/close as
+        float32). The block is copied chunk_bars dates at a time, so the
+        float64 temporaries stay bounded for very wide universes.
+        """
+        first, last = self._bounds(start, end)
+        columns = self._columns(tickers, fields)
+        values = np.empty((last - first, len(columns)), dtype=dtype)
+        step = chunk_bars or max(last - first, 1)
+        for lo in range(first, last, step):
+            hi = min(lo + step, last)
+            self._fill(values[lo - first:hi - first], columns, lo, hi)
+
+        return pd.DataFrame(
+            values,
+            index=self.dates[first:last],
+            columns=pd.MultiIndex.from_tuples(columns),
+        )
+
+    def iter_chunks(self, chunk_bars: int, start=None, end=None, tickers=None, fields=None,
+                    dtype=np.float64):
+        """Yield the load() frame for [start, end] as consecutive frames of at most chunk_bars dates"""
+        first, last = self._bounds(start, end)
+        columns = self._columns(tickers, fields)
+        for lo in range(first, last, chunk_bars):
+            hi = min(lo + chunk_bars, last)
+            values = np.empty((hi - lo, len(columns)), dtype=dtype)
+            self._fill(values, columns, lo, hi)
+            yield pd.DataFrame(values, index=self.dates[lo:hi], columns=pd.MultiIndex.from_tuples(columns))
+
+    def matrix(self, field: str, start=None, end=None, tickers=None, dtype=np.float64) -> np.ndarray:
+        """One field as a (dates x tickers) array, in the given ticker order"""
+        first, last = self._bounds(start, end)
+        tickers = self.tickers if tickers is None else tickers
+        rows = [self._ticker_pos[t] for t in tickers]
+        return np.ascontiguousarray(self.field(field)[rows, first:last].T, dtype=dtype)
@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Sections timed inside Backtester.run, in report order
+SECTIONS = (
+    'on_bar', 'trading_state', 'get_signals',
+    'update_investment', 'calculate_positions', 'calculate_cash', 'bookkeeping',
+)
+
+PROFILE_JSON = 'profile.json'
+PROFILE_FOLDED = 'profile.folded'
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is a no-op"""
+
+    enabled = False
+    _section = _NullSection()
+
+    def section(self, name):
+        return self._section
+
+    def next_bar(self, index):
+        pass
+
+    def start(self, root_code=None):
+        pass
+
+    def stop(self):
+        pass
+
+
+class _Section:
+    __slots__ = ('profiler', 'column', 'started', 'traced')
+
+    def __init__(self, profiler, column):
+        self.profiler = profiler
+        self.column = column
+
+    def __enter__(self):
+        if self.profiler.trace_memory:
+            self.traced = tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.started
+        profiler = self.profiler
+        profiler.bar_ns[profiler.bar, self.column] += elapsed
+        profiler.calls[self.column] += 1
+        if profiler.trace_memory:
+            profiler.net_bytes[self.column] += tracemalloc.get_traced_memory()[0] - self.traced
+        return False
+
+
+class RunProfiler:
+    """Per-section and per-bar timings for one Backtester.run.
+
+    Sections are timed with perf_counter_ns into a (bars x sections) array.
+    With trace_memory, tracemalloc records peak memory, the memory each
+    section leaves allocated and the top allocation sites by size and block
+    count (this slows the run down, so timings are inflated).
+    With sample_interval, a background thread samples the running stack
+    for a flamegraph in folded-stack format.
+    """
+
+    enabled = True
+
+    def __init__(self, n_bars: int, trace_memory: bool = True, sample_interval: float = 0.001):
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+        self.bar = 0
+        self.first_bar = None
+        self.bar_ns = np.zeros((n_bars, len(SECTIONS)), dtype=np.int64)
+        self.net_bytes = np.zeros(len(SECTIONS), dtype=np.int64)
+        self.calls = np.zeros(len(SECTIONS), dtype=np.int64)
+        self.samples = Counter()
+        self._sections = {name: _Section(self, i) for i, name in enumerate(SECTIONS)}
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        self._started_tracemalloc = False
+        self.wall_ns = 0
+        self.peak_traced = None
+        self.top_allocations = []
+
+    def section(self, name):
+        return self._sections[name]
+
+    def next_bar(self, index):
+        if self.first_bar is None:
+            self.first_bar = index
+        self.bar = index
+
+    def start(self, root_code=None):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if self.sample_interval:
+            thread_id = threading.get_ident()
+            self._sampler = threading.Thread(target=self._sample, args=(thread_id, root_code), daemon=True)
+            self._sampler.start()
+        self._wall_started = time.perf_counter_ns()
+
+    def stop(self):
+        self.wall_ns = time.perf_counter_ns() - self._wall_started
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+        if self.trace_memory:
+            self.peak_traced = tracemalloc.get_traced_memory()[1]
+            # Leave out the profiler's own bookkeeping (the sample counter)
+            snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+            stats = snapshot.statistics('lineno')[:10]
+            self.top_allocations = [
+                {'site': str(stat.traceback[0]), 'size': stat.size, 'count': stat.count}
+                for stat in stats
+            ]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def _sample(self, thread_id, root_code):
+        while not self._stop_sampling.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                if code is root_code:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def report(self) -> dict:
+        # Only the bars this run processed (a resumed run starts past bar 1)
+        first = self.first_bar if self.first_bar is not None else self.bar + 1
+        bars = self.bar_ns[first:self.bar + 1]
+        per_bar_total = bars.sum(axis=1)
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            column = bars[:, i]
+            sections[name] = {
+                'total_ms': column.sum() / 1e6,
+                'share': column.sum() / self.wall_ns if self.wall_ns else None,
+                'calls': int(self.calls[i]),
+                'per_bar_us': {
+                    'mean': column.mean() / 1e3 if len(column) else None,
+                    'p50': np.percentile(column, 50) / 1e3 if len(column) else None,
+                    'p95': np.percentile(column, 95) / 1e3 if len(column) else None,
+                    'max': column.max() / 1e3 if len(column) else None,
+                },
+                'net_allocated_bytes': int(self.net_bytes[i]) if self.trace_memory else None,
+            }
+
+        report = {
+            'bars': len(bars),
+            'wall_ms': self.wall_ns / 1e6,
+            'untimed_ms': (self.wall_ns - per_bar_total.sum()) / 1e6,
+            'sections': sections,
+            'slowest_bars': [
+                {'bar': int(i) + first, 'us': per_bar_total[i] / 1e3}
+                for i in np.argsort(per_bar_total)[::-1][:10]
+            ],
+            'memory': {
+                'traced_peak_bytes': self.peak_traced,
+                'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+                'top_allocations': self.top_allocations,
+            },
+            'samples': sum(self.samples.values()),
+        }
+        return report
+
+    def write(self, save_path: str):
+        """Write profile.json and profile.folded (for flamegraph.pl / speedscope) into save_path"""
+        os.makedirs(save_path, exist_ok=True)
+        with open(os.path.join(save_path, PROFILE_JSON), 'w') as f:
+            json.dump(self.report(), f, indent=2, default=float)
+        with open(os.path.join(save_path, PROFILE_FOLDED), 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f'{stack} {count}\n')
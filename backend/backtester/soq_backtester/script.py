@@ -3,6 +3,12 @@ from typing import Tuple
 import numpy as np
 
 class Strategy():
+   # Number of trailing bars passed to get_signals in tradingState['processed_data']
+   # and tradingState['window'] (a read-only NumPy view). None passes the full history.
+   lookback = None
+
+   # Optionally define on_bar(self, timestamp, row) to update rolling indicators
+   # incrementally; it is called once per bar with the newest processed row.
    
    def process_data(self, data) -> pd.DataFrame:
       return data
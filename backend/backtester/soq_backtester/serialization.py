@@ -0,0 +1,98 @@
+"""JSON encoding shared by the exports and the API.
+
+dumps() returns bytes and handles NumPy scalars and arrays, datetimes
+(pandas Timestamps included, as ISO 8601) and NaN/inf (as null) without
+a Python-level walk of the payload when orjson is installed. Without it,
+or with JSON_BACKEND=json, the stdlib encoder produces the same values,
+walking the payload once to replace NaN and convert NumPy types.
+"""
+import datetime
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None and os.getenv('JSON_BACKEND', 'orjson') == 'orjson' else 'json'
+
+
+def _default(obj):
+    # Only reached for what orjson does not encode natively
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        # Non-contiguous or object arrays
+        return np.ascontiguousarray(obj) if obj.dtype.kind in 'biufM' else obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _plain(obj):
+    """The stdlib encoder's view of obj: NumPy types as Python ones, non-finite floats as None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k if isinstance(k, str) else str(k): _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        if obj.ndim != 1 or obj.dtype.kind == 'M':
+            return [_plain(v) for v in obj]
+        if obj.dtype.kind not in 'biuf':
+            return _plain(obj.tolist())
+        # float32 through its shortest repr, as orjson writes it: 0.1 rather than 0.10000000149011612
+        values = obj.astype(str).astype(np.float64).tolist() if obj.dtype == np.float32 else obj.tolist()
+        if obj.dtype.kind == 'f':
+            for i in np.flatnonzero(~np.isfinite(obj)):
+                values[i] = None
+        return values
+    if isinstance(obj, np.datetime64):
+        return None if np.isnat(obj) else pd.Timestamp(obj).isoformat()
+    if isinstance(obj, np.generic):
+        return _plain(obj.item())
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    return obj
+
+
+def records(frame: pd.DataFrame) -> list:
+    """frame.to_dict(orient='records') with datetime columns as datetime.datetime, which orjson encodes natively"""
+    columns = [
+        pd.DatetimeIndex(frame[name]).to_pydatetime().tolist() if frame[name].dtype.kind == 'M' else frame[name].tolist()
+        for name in frame.columns
+    ]
+    names = list(frame.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+if BACKEND == 'orjson':
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+        option = _OPTIONS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    loads = orjson.loads
+else:
+    def dumps(obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+        return json.dumps(
+            _plain(obj), indent=2 if indent else None, sort_keys=sort_keys,
+            separators=(',', ': ') if indent else (',', ':'), ensure_ascii=False, allow_nan=False,
+        ).encode()
+
+    loads = json.loads
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Fields the engine itself reads; everything else is only needed for charts
+ENGINE_FIELDS = ('open', 'close')
+# Fields the chart export needs, from the data frame or else the store
+CHART_FIELDS = ('open', 'high', 'low', 'close')
+
+
+class StoragePolicy:
+    """How a Backtester stores prices and per-bar results.
+
+    The default keeps everything in 64-bit, exactly as before. compact()
+    stores prices and signals as float32 and positions as int32, and keeps
+    only open/close in the data frame; high/low are read back from the
+    OHLCV store when charts are exported. Accounting is always done in
+    float64 on the current bar's prices, but float32 storage rounds the
+    prices themselves to about 7 significant digits, so results can
+    differ slightly from a float64 run.
+    """
+
+    def __init__(self, price_dtype=np.float64, position_dtype=np.int64, signal_dtype=np.float64,
+                 fields=None):
+        self.price_dtype = np.dtype(price_dtype)
+        self.position_dtype = np.dtype(position_dtype)
+        self.signal_dtype = np.dtype(signal_dtype)
+        # None keeps every field of the data frame
+        self.fields = tuple(fields) if fields is not None else None
+
+    @classmethod
+    def compact(cls) -> 'StoragePolicy':
+        return cls(np.float32, np.int32, np.float32, fields=ENGINE_FIELDS)
+
+    def __repr__(self):
+        return (f'StoragePolicy(price_dtype={self.price_dtype}, position_dtype={self.position_dtype}, '
+                f'signal_dtype={self.signal_dtype}, fields={self.fields})')
+
+    def load(self, store, start=None, end=None, tickers=None, chunk_bars: int = 512) -> pd.DataFrame:
+        """Load a slice from an OHLCVStore with only the fields and dtype this policy keeps"""
+        return store.load(start=start, end=end, tickers=tickers, fields=self.fields,
+                          dtype=self.price_dtype, chunk_bars=chunk_bars)
+
+
+def _nbytes(obj) -> int:
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=False).sum())
+    return 0
+
+
+def memory_report(backtester) -> dict:
+    """Bytes held by each large attribute of a Backtester, plus the total.
+
+    Frames that are views over a buffer already counted (all_positions over
+    position_buffer, for example) are reported as 0.
+    """
+    buffers = {
+        name: getattr(backtester, name)
+        for name in ('open_prices', 'close_prices', 'position_buffer', 'signal_buffer',
+                     'portfolio_history', 'cash_history', 'investment_history')
+    }
+    report = {'data': _nbytes(backtester.data)}
+    report.update({name: _nbytes(array) for name, array in buffers.items()})
+    for name in ('all_positions', 'all_signals'):
+        frame = getattr(backtester, name)
+        values = frame.to_numpy() if len(frame.columns) and len(frame) else None
+        shared = values is not None and any(np.shares_memory(values, array) for array in buffers.values())
+        report[name] = 0 if shared else _nbytes(frame)
+    report['total'] = sum(report.values())
+    return report
+
+
+def estimate_memory(n_bars: int, n_tickers: int, policy: StoragePolicy = None, n_fields: int = 5) -> dict:
+    """Bytes a Backtester over n_bars x n_tickers would hold, for sizing a universe before loading it"""
+    policy = policy or StoragePolicy()
+    kept = n_fields if policy.fields is None else len(policy.fields)
+    cells = n_bars * n_tickers
+    report = {
+        'data': cells * kept * policy.price_dtype.itemsize + n_bars * 8,
+        'open_prices': cells * policy.price_dtype.itemsize,
+        'close_prices': cells * policy.price_dtype.itemsize,
+        'position_buffer': cells * policy.position_dtype.itemsize,
+        'signal_buffer': max(n_bars - 1, 0) * n_tickers * policy.signal_dtype.itemsize,
+        'portfolio_history': n_bars * 8,
+        'cash_history': n_bars * 8,
+        'investment_history': n_bars * 8,
+    }
+    report['total'] = sum(report.values())
+    return report
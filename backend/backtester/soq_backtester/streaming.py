@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import tqdm
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .analytics import EnginePortfolio
+    from .backtester import Backtester
+    from .storage import StoragePolicy
+except ImportError:
+    from analytics import EnginePortfolio
+    from backtester import Backtester
+    from storage import StoragePolicy
+
+META_FILE = 'meta.json'
+
+# Per-bar history files: name -> Backtester buffer. signals has one row
+# fewer than the rest, like signal_buffer.
+HISTORY_FILES = {
+    'positions': 'position_buffer',
+    'signals': 'signal_buffer',
+    'portfolio': 'portfolio_history',
+    'cash': 'cash_history',
+    'investment': 'investment_history',
+}
+
+
+class HistoryWriter:
+    """Appends per-bar results to raw binary files that can be memory-mapped back.
+
+    meta.json holds the tickers, dtypes and number of bars written, and is
+    replaced after every flush, so readers only ever see whole chunks.
+    """
+
+    def __init__(self, path: str, tickers, index_name, policy: StoragePolicy):
+        self.path = path
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        self.meta = {
+            'tickers': list(tickers),
+            'index_name': index_name,
+            'n_bars': 0,
+            'dtypes': {
+                'dates': 'datetime64[ns]',
+                'positions': policy.position_dtype.str,
+                'signals': policy.signal_dtype.str,
+                'portfolio': '<f8',
+                'cash': '<f8',
+                'investment': '<f8',
+            },
+        }
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def append(self, dates: pd.DatetimeIndex, arrays: dict):
+        for name, values in (('dates', dates.values.astype('datetime64[ns]')), *arrays.items()):
+            values = np.ascontiguousarray(values, dtype=self.meta['dtypes'][name])
+            with open(os.path.join(self.path, f'{name}.bin'), 'ab') as f:
+                f.write(values.tobytes())
+        self.meta['n_bars'] += len(dates)
+        self._write_meta()
+
+
+def load_history(path: str) -> dict:
+    """Memory-map a history written by StreamingBacktester; returns dates plus one array per file"""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    n_bars, n_tickers = meta['n_bars'], len(meta['tickers'])
+    shapes = {
+        'dates': (n_bars,),
+        'positions': (n_bars, n_tickers),
+        'signals': (max(n_bars - 1, 0), n_tickers),
+        'portfolio': (n_bars,),
+        'cash': (n_bars,),
+        'investment': (n_bars,),
+    }
+    history = {'tickers': pd.Index(meta['tickers'])}
+    for name, shape in shapes.items():
+        dtype = np.dtype(meta['dtypes'][name])
+        if np.prod(shape) == 0:
+            history[name] = np.empty(shape, dtype=dtype)
+        else:
+            history[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=shape)
+    history['dates'] = pd.DatetimeIndex(history['dates'], name=meta['index_name'])
+    return history
+
+
+class StreamingBacktester:
+    """Runs a strategy over an iterator of consecutive date-chunks.
+
+    Only the current chunk plus the strategy's lookback window of earlier
+    bars is held in memory. Each chunk is run by a regular Backtester that
+    picks up the account state, traderData and strategy object left by the
+    previous one, and its new bars are appended to history_dir before the
+    next chunk is read. The strategy must set `lookback`, and its
+    process_data only sees the resident bars, so any warm-up it needs has
+    to fit inside that lookback.
+    """
+
+    def __init__(self, initial_value: float, history_dir: str, strategy=None, engine: str = 'numpy',
+                 policy: StoragePolicy = None):
+        self.initial_value = initial_value
+        self.history_dir = history_dir
+        self.strategy = strategy
+        self.engine = engine
+        self.policy = policy if policy is not None else StoragePolicy()
+        self.n_bars = 0
+        self.state = None
+
+    def run(self, chunks, progress: bool = True):
+        """Consume chunks (e.g. OHLCVStore.iter_chunks or a chunked CSV reader) to the end"""
+        tail = None
+        writer = None
+        for chunk in tqdm.tqdm(chunks, disable=not progress, unit='chunk'):
+            if len(chunk) == 0:
+                continue
+            resident = chunk if tail is None else pd.concat([tail, chunk])
+            backtester = Backtester(resident, self.initial_value, engine=self.engine,
+                                    strategy=self.strategy, policy=self.policy)
+            self.strategy = backtester.strategy
+            lookback = getattr(self.strategy, 'lookback', None)
+            if lookback is None:
+                raise ValueError('Streaming needs a strategy with a bounded lookback')
+
+            first = 0
+            if tail is not None:
+                # The tail bars were already run and written by the previous chunk
+                first = len(tail)
+                backtester.load_state(self.state, current_index=first)
+            backtester.run(progress=False)
+
+            if writer is None:
+                writer = HistoryWriter(self.history_dir, backtester.tickers, resident.index.name, self.policy)
+            writer.append(resident.index[first:], {
+                name: getattr(backtester, buffer)[max(first - 1, 0):] if name == 'signals'
+                else getattr(backtester, buffer)[first:]
+                for name, buffer in HISTORY_FILES.items()
+            })
+            self.n_bars += len(resident) - first
+            self.state = backtester.carry_state()
+            tail = resident.iloc[-max(lookback, 1):]
+        return self
+
+    def history(self) -> dict:
+        return load_history(self.history_dir)
+
+    def portfolio(self, open_prices: np.ndarray = None, close_prices: np.ndarray = None) -> EnginePortfolio:
+        """Analytics over the written history.
+
+        The value-based metrics work from the history alone; trades (and
+        therefore stats()) also need the full (bars x tickers) open and
+        close prices, e.g. from OHLCVStore.matrix.
+        """
+        history = self.history()
+        run = types.SimpleNamespace(
+            data=types.SimpleNamespace(index=history['dates']),
+            initial_value=self.initial_value,
+            portfolio_history=np.asarray(history['portfolio']),
+            cash_history=np.asarray(history['cash']),
+            investment_history=np.asarray(history['investment']),
+            position_buffer=history['positions'],
+            open_prices=open_prices,
+            close_prices=close_prices,
+            tickers=history['tickers'],
+        )
+        return EnginePortfolio(run)
@@ -0,0 +1,97 @@
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from .backtester import Backtester
+    from .batch import BatchBacktester
+except ImportError:
+    from backtester import Backtester
+    from batch import BatchBacktester
+
+# Per-worker state set up once by _attach_prices
+_WORKER = {}
+
+
+def expand_grid(param_grid) -> list:
+    """Turn {'a': [1, 2], 'b': [3]} into [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]"""
+    if isinstance(param_grid, dict):
+        keys = list(param_grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*param_grid.values())]
+    return [dict(params) for params in param_grid]
+
+
+def _attach_prices(shm_name, shape, index, columns, initial_value, engine):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    values.flags.writeable = False
+    _WORKER['shm'] = shm
+    _WORKER['data'] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+    _WORKER['initial_value'] = initial_value
+    _WORKER['engine'] = engine
+
+
+def _run_one(strategy_cls, params: dict) -> dict:
+    backtester = Backtester(
+        _WORKER['data'],
+        _WORKER['initial_value'],
+        engine=_WORKER['engine'],
+        strategy=strategy_cls(**params),
+    )
+    backtester.run(progress=False)
+    portfolio = backtester.portfolio()
+    portfolio_summary = backtester.build_portfolio_summary(portfolio)
+    return {**params, **backtester.compute_metrics(portfolio, portfolio_summary)}
+
+
+def _run_batch(strategy_cls, combos: list) -> list:
+    batch = BatchBacktester(_WORKER['data'], _WORKER['initial_value'],
+                            [strategy_cls(**params) for params in combos])
+    rows = []
+    for params, backtester in zip(combos, batch.run(progress=False)):
+        portfolio = backtester.portfolio()
+        portfolio_summary = backtester.build_portfolio_summary(portfolio)
+        rows.append({**params, **backtester.compute_metrics(portfolio, portfolio_summary)})
+    return rows
+
+
+def run_sweep(strategy_cls, param_grid, data: pd.DataFrame, initial_value: float,
+              max_workers: int = None, engine: str = 'numpy', batch_size: int = 1) -> pd.DataFrame:
+    """Run strategy_cls(**params) for every parameter combination in a process pool.
+
+    The price frame is copied once into shared memory and every worker wraps
+    that block in a DataFrame instead of receiving its own pickled copy.
+    With batch_size > 1 each task steps that many combinations through the
+    data together in a BatchBacktester (numpy engine only). Returns one row
+    per combination with the parameters followed by the metrics from
+    Backtester.compute_metrics.
+    """
+    if batch_size > 1 and engine != 'numpy':
+        raise ValueError('batch_size > 1 requires the numpy engine')
+    combos = expand_grid(param_grid)
+    values = data.to_numpy(dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        del values
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_prices,
+            initargs=(shm.name, data.shape, data.index, data.columns, initial_value, engine),
+        ) as pool:
+            if batch_size > 1:
+                batches = [combos[i:i + batch_size] for i in range(0, len(combos), batch_size)]
+                rows = [row for batch in pool.map(_run_batch, itertools.repeat(strategy_cls), batches) for row in batch]
+            else:
+                rows = list(pool.map(_run_one, itertools.repeat(strategy_cls), combos))
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
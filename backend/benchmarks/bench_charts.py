@@ -0,0 +1,104 @@
+"""Chart export and watchlist fetches: one file per ticker vs the chart store.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_charts --bars 1000 --tickers 2000 --watchlist 20
+
+Writes the charts both ways (the previous charts/<ticker>.json plus .gz
+and .br, and the single charts.bin with its index), then serves each
+layout through the Flask app and times loading the tickers, fetching a
+watchlist with one /candlestick request per ticker, and fetching it with
+one /candlesticks request.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester.backtester import Backtester
+from backtester.soq_backtester.charts import encode_chart, write_charts
+from benchmarks.suite import flask_client, median_time
+from benchmarks.synthetic import synthetic_ohlcv
+
+SUFFIXES = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+
+
+def write_chart_files(save_path, tickers, dates, ohlc, positions):
+    # The previous layout: three small files per ticker
+    charts_dir = os.path.join(save_path, 'charts')
+    os.makedirs(charts_dir)
+    for j, ticker in enumerate(tickers):
+        for encoding, body in encode_chart(ticker, dates, ohlc[:, j], positions[:, j]).items():
+            with open(os.path.join(charts_dir, f'{ticker}.json{SUFFIXES[encoding]}'), 'wb') as f:
+                f.write(body)
+
+
+def count_files(path):
+    return sum(len(files) for _, _, files in os.walk(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=1000)
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--watchlist', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = synthetic_ohlcv(args.bars, args.tickers, seed=args.seed)
+    backtester = Backtester(data, 1_000_000.0)
+    backtester.run(progress=False)
+    dates, ohlc, positions = backtester.chart_arrays()
+    tickers = list(backtester.tickers)
+    rng = np.random.default_rng(args.seed)
+    watchlist = [tickers[i] for i in rng.choice(len(tickers), args.watchlist, replace=False)]
+    headers = {'Accept-Encoding': 'br, gzip'}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = flask_client(tmp)
+        client = server.app.test_client()
+        # Only the charts are written, so the other preloaded files are missing on purpose
+        server.app.logger.setLevel(logging.ERROR)
+        layouts = {'files': os.path.join(tmp, 'files'), 'store': os.path.join(tmp, 'store')}
+        start = time.perf_counter()
+        write_chart_files(layouts['files'], tickers, dates, ohlc, positions)
+        write_files = time.perf_counter() - start
+        os.makedirs(layouts['store'])
+        start = time.perf_counter()
+        write_charts(layouts['store'], tickers, dates, ohlc, positions, workers=1)
+        write_store = time.perf_counter() - start
+        print(f'{args.tickers} tickers x {args.bars} bars')
+        print(f'  write  files {write_files:7.2f}s ({count_files(layouts["files"])} files)   '
+              f'store {write_store:7.2f}s ({count_files(layouts["store"])} files)')
+
+        for name, path in layouts.items():
+            server.FRONTEND_PATH = path
+            load = median_time(server.load_precomputed_data, args.repeat)
+            server.CHART_CACHE.clear()
+
+            def one_by_one():
+                for ticker in watchlist:
+                    assert client.get(f'/candlestick/{ticker}', headers=headers).status_code == 200
+
+            def batch():
+                assert client.get('/candlesticks?tickers=' + ','.join(watchlist)).status_code == 200
+
+            # The first pass is cold for the per-file cache, the median warm
+            start = time.perf_counter()
+            one_by_one()
+            cold = time.perf_counter() - start
+            warm = median_time(one_by_one, args.repeat)
+            batched = median_time(batch, args.repeat)
+            print(f'  {name:<6s} load tickers {1000 * load:7.2f}ms   {args.watchlist} x /candlestick '
+                  f'cold {1000 * cold:7.2f}ms warm {1000 * warm:7.2f}ms   /candlesticks {1000 * batched:7.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
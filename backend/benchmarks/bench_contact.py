@@ -0,0 +1,85 @@
+"""/contact latency and mail delivery against a local stand-in SMTP server.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_contact --requests 50 --connect-delay 0.3
+
+Times --requests /contact posts with the old path (two send_email calls,
+each on a fresh connection) and with the mail queue, then waits for the
+queue to drain and prints its stats. A second pass has the server hang up
+every few messages and reject the first ones with 451, and checks that
+the queue reconnects and retries until everything is delivered.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.smtp_sink import SMTPSink
+
+FORM = {'name': 'Bench', 'email': 'bench@example.com', 'subject': 'Hello', 'message': 'Just checking in.'}
+
+
+def percentiles(ms: np.ndarray) -> str:
+    return f'p50 {np.percentile(ms, 50):8.2f}ms  p95 {np.percentile(ms, 95):8.2f}ms'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--connect-delay', type=float, default=0.3, help='simulated STARTTLS + login per connection')
+    parser.add_argument('--message-delay', type=float, default=0.01)
+    parser.add_argument('--legacy-requests', type=int, default=5)
+    args = parser.parse_args()
+
+    sink = SMTPSink(connect_delay=args.connect_delay, message_delay=args.message_delay).start()
+    os.environ.update(SMTP_HOST='127.0.0.1', SMTP_PORT=str(sink.port), SMTP_STARTTLS='0',
+                      EMAIL='bench@quantedge.local', EMAIL_PASS='')
+
+    import email_utils
+    import app as server
+
+    legacy = []
+    for _ in range(args.legacy_requests):
+        start = time.perf_counter()
+        email_utils.send_email('admin@example.com', f"QuantEdge Contact: {FORM['subject']}", FORM['message'])
+        email_utils.send_email(FORM['email'], 'Thanks for contacting QuantEdge', FORM['message'])
+        legacy.append(time.perf_counter() - start)
+    print(f'/contact, send_email inline: {percentiles(np.array(legacy) * 1000)}')
+
+    client = server.app.test_client()
+    queued = []
+    received_before = len(sink.messages)
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        response = client.post('/contact', json=FORM)
+        queued.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data
+    print(f'/contact, mail queue:        {percentiles(np.array(queued) * 1000)}')
+    start = time.perf_counter()
+    assert email_utils.MAIL_QUEUE.join(timeout=120)
+    delivered = len(sink.messages) - received_before
+    print(f'queue drained in {time.perf_counter() - start:.2f}s: {delivered}/{2 * args.requests} delivered')
+    print(json.dumps(email_utils.MAIL_QUEUE.stats(), indent=2))
+
+    flaky = SMTPSink(connect_delay=args.connect_delay, message_delay=args.message_delay,
+                     drop_every=7, fail_first=3).start()
+    mail = email_utils.MailQueue(host='127.0.0.1', port=flaky.port, username='bench@quantedge.local',
+                                 password='', starttls=False, backoff=0.05)
+    for i in range(args.requests):
+        mail.enqueue(f'user{i}@example.com', 'Flaky', 'Delivered despite the relay')
+    assert mail.join(timeout=120)
+    stats = mail.stats()
+    mail.close()
+    status = 'OK' if len(flaky.messages) == args.requests and stats['failed'] == 0 else 'LOST MESSAGES'
+    print(f'flaky relay: {len(flaky.messages)}/{args.requests} delivered, {stats["retried"]} retries, '
+          f'{stats["connects"]} connections -> {status}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Per-ticker cost of the chart export in Backtester.export_results.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_export --bars 2500 --tickers 500 --workers 1 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester.backtester import Backtester
+from backtester.soq_backtester.charts import write_charts
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=2500)
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = synthetic_ohlcv(args.bars, args.tickers, seed=args.seed)
+    backtester = Backtester(data, 1_000_000.0)
+    backtester.run(progress=False)
+
+    start = time.perf_counter()
+    dates, ohlc, positions = backtester.chart_arrays()
+    prepare = time.perf_counter() - start
+    print(f'{args.bars} bars x {args.tickers} tickers, chart_arrays: {prepare:.3f}s')
+
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as charts_dir:
+            start = time.perf_counter()
+            write_charts(charts_dir, backtester.tickers, dates, ohlc, positions, workers=workers)
+            elapsed = time.perf_counter() - start
+        print(f'workers={workers:<3d} total {elapsed:8.3f}s  per ticker {1000 * elapsed / args.tickers:8.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
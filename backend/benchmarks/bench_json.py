@@ -0,0 +1,108 @@
+"""JSON encoding time of the portfolio summary and chart payloads.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_json --bars 2500 --tickers 20
+
+Compares the previous stdlib encoding (to_dict and json.dumps with
+default=str for the summary, NaN patched into lists for the charts,
+Flask's default provider for responses) against serialization.dumps with
+orjson and with the stdlib fallback, and checks that all of them decode
+to the same data.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester import serialization
+from backtester.soq_backtester.backtester import Backtester
+from backtester.soq_backtester.charts import candlestick_payload
+from benchmarks.suite import median_time
+from benchmarks.synthetic import synthetic_ohlcv
+from json_provider import FastJSONProvider
+
+
+def legacy_chart(payload: dict) -> bytes:
+    # The previous charts.py: NumPy columns to lists with NaN patched to None
+    def with_nulls(values):
+        out = values.tolist()
+        for i in np.flatnonzero(np.isnan(values)):
+            out[i] = None
+        return out
+    plain = {k: with_nulls(v) if isinstance(v, np.ndarray) and v.dtype.kind == 'f'
+             else v.tolist() if isinstance(v, np.ndarray) else v
+             for k, v in payload.items()}
+    return json.dumps(plain, separators=(',', ':')).encode()
+
+
+def stdlib_dumps(obj) -> bytes:
+    return json.dumps(serialization._plain(obj), separators=(',', ':'), allow_nan=False).encode()
+
+
+def normalized(data: bytes):
+    # Decode for comparison; summary dates were written by str() before, isoformat() now
+    obj = json.loads(data)
+    if isinstance(obj, list) and obj and isinstance(obj[0], dict) and 'date' in obj[0]:
+        for row in obj:
+            row['date'] = row['date'].replace(' ', 'T')
+    return obj
+
+
+def report(name: str, encoders: dict, payload, repeat: int):
+    outputs = {label: normalized(fn(payload)) for label, fn in encoders.items()}
+    reference = next(iter(outputs.values()))
+    same = all(out == reference for out in outputs.values())
+    base = None
+    for label, fn in encoders.items():
+        seconds = median_time(lambda: fn(payload), repeat)
+        base = base or seconds
+        print(f'{name:<20s} {label:<18s} {1000 * seconds:9.3f}ms  {base / seconds:6.1f}x')
+    print(f'{name:<20s} outputs identical: {same}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=2500)
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = synthetic_ohlcv(args.bars, args.tickers, seed=args.seed)
+    backtester = Backtester(data, 1_000_000.0)
+    backtester.run(progress=False)
+    summary = backtester.build_portfolio_summary(backtester.portfolio())
+    dates, ohlc, positions = backtester.chart_arrays()
+    ohlc[::50, 0] = np.nan  # Missing bars exercise the NaN -> null path
+    chart = candlestick_payload(backtester.tickers[0], dates, ohlc[:, 0], positions[:, 0])
+
+    print(f'serialization backend: {serialization.BACKEND}')
+    encoders = {'stdlib fallback': stdlib_dumps}
+    if serialization.BACKEND == 'orjson':
+        encoders['orjson'] = serialization.dumps
+
+    # From the DataFrame, as export_results gets it
+    report('portfolio_summary', {
+        'json default=str': lambda frame: json.dumps(frame.to_dict(orient='records'), default=str).encode(),
+        **{label: lambda frame, fn=fn: fn(serialization.records(frame)) for label, fn in encoders.items()},
+    }, summary, args.repeat)
+    report('chart', {'json + NaN patch': legacy_chart, **encoders}, chart, args.repeat)
+
+    # The same payloads as Flask responses; the previous app reloaded them with json.load first
+    app = Flask(__name__)
+    providers = {'flask default': DefaultJSONProvider(app), 'FastJSONProvider': FastJSONProvider(app)}
+    parsed = json.loads(serialization.dumps(serialization.records(summary)))
+    with app.app_context():
+        report('jsonify summary', {label: lambda o, p=p: p.response(o).get_data() for label, p in providers.items()},
+               parsed, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
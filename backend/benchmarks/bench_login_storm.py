@@ -0,0 +1,129 @@
+"""Data endpoint latency while a burst of logins hits the server.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_login_storm --storm-threads 32 --seconds 5
+    python -m benchmarks.bench_login_storm --auth-workers 32 --auth-queue 1000   # effectively unbounded
+
+Serves the app on a local port with werkzeug's threaded server, probes
+/performance_metrics and /candlestick/<ticker> on their own, then again
+while --storm-threads clients log in as fast as they can, and prints the
+probe latencies, the login status codes and the server's /metrics.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester.backtester import Backtester
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def request(url: str, body: dict = None) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def probe(base: str, paths: list, stop: threading.Event) -> np.ndarray:
+    latencies = []
+    while not stop.is_set():
+        for path in paths:
+            start = time.perf_counter()
+            status = request(base + path)
+            latencies.append(time.perf_counter() - start)
+            assert status == 200, (path, status)
+    return np.array(latencies) * 1000
+
+
+def storm(base: str, email: str, password: str, stop: threading.Event, statuses: Counter, lock: threading.Lock):
+    while not stop.is_set():
+        status = request(base + '/login', {'email': email, 'password': password})
+        with lock:
+            statuses[status] += 1
+
+
+def timed_probe(base, paths, seconds, storm_threads=0, email=None, password=None):
+    stop = threading.Event()
+    statuses, lock = Counter(), threading.Lock()
+    stormers = [
+        threading.Thread(target=storm, args=(base, email, password, stop, statuses, lock))
+        for _ in range(storm_threads)
+    ]
+    for thread in stormers:
+        thread.start()
+    result = {}
+    prober = threading.Thread(target=lambda: result.setdefault('ms', probe(base, paths, stop)))
+    prober.start()
+    time.sleep(seconds)
+    stop.set()
+    prober.join()
+    for thread in stormers:
+        thread.join()
+    return result['ms'], statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--storm-threads', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--auth-workers', type=int, default=None, help='overrides AUTH_WORKERS')
+    parser.add_argument('--auth-queue', type=int, default=None, help='overrides AUTH_QUEUE')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['USERS_DB'] = os.path.join(tmp, 'users.db')
+    os.environ['RESULT_CACHE_DIR'] = os.path.join(tmp, 'result_cache')
+    if args.auth_workers is not None:
+        os.environ['AUTH_WORKERS'] = str(args.auth_workers)
+    if args.auth_queue is not None:
+        os.environ['AUTH_QUEUE'] = str(args.auth_queue)
+
+    import app as server
+    import utils
+    from werkzeug.serving import make_server
+
+    backtester = Backtester(synthetic_ohlcv(500, 20), 1_000_000.0)
+    backtester.run(progress=False)
+    server.FRONTEND_PATH = os.path.join(tmp, 'frontend_data')
+    backtester.export_results(backtester.portfolio(), save_path=server.FRONTEND_PATH, workers=1)
+    server.load_precomputed_data()
+    utils.get_connection(csv_file=os.path.join(tmp, 'missing.csv'))
+    utils.create_user('Storm', 'storm@example.com', 'correct horse')
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{httpd.server_port}'
+    paths = ['/performance_metrics', f'/candlestick/{backtester.tickers[0]}']
+
+    quiet, _ = timed_probe(base, paths, args.seconds)
+    server.METRICS.reset()
+    loud, statuses = timed_probe(base, paths, args.seconds, args.storm_threads, 'storm@example.com', 'correct horse')
+
+    print(f'auth pool: {utils.AUTH_POOL.max_workers} workers, queue {utils.AUTH_POOL.max_queue}')
+    print(f'data endpoints, idle:        p50 {np.percentile(quiet, 50):7.2f}ms  p95 {np.percentile(quiet, 95):7.2f}ms  ({len(quiet)} requests)')
+    print(f'data endpoints, login storm: p50 {np.percentile(loud, 50):7.2f}ms  p95 {np.percentile(loud, 95):7.2f}ms  ({len(loud)} requests)')
+    print(f'logins during storm: {dict(sorted(statuses.items()))}')
+    print(json.dumps(json.loads(server.app.test_client().get('/metrics').data), indent=2))
+    httpd.shutdown()
+
+
+if __name__ == '__main__':
+    main()
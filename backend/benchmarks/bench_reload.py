@@ -0,0 +1,111 @@
+"""Request latency and consistency while new exports are published and hot-reloaded.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_reload --bars 1000 --tickers 100 --publishes 5 --readers 4
+
+Reader threads fetch /tickers followed by /candlesticks for the first 50 listed
+tickers, first against a quiet server and then while new versions (with
+alternating ticker counts) are published and picked up by the watcher. A
+read is torn when the batch misses a ticker that /tickers just listed.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester.artefacts import publish, staging_dir
+from backtester.soq_backtester.backtester import Backtester
+from benchmarks.suite import flask_client
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def read_loop(client, stop, latencies, torn):
+    while not stop.is_set():
+        start = time.perf_counter()
+        tickers = client.get('/tickers').get_json()
+        batch = client.get('/candlesticks?tickers=' + ','.join(tickers[:50])).get_json()
+        latencies.append(time.perf_counter() - start)
+        if batch['missing']:
+            torn.append(batch['missing'])
+
+
+def measure(server, readers, duration, publisher=None):
+    stop = threading.Event()
+    latencies, torn = [], []
+    threads = [
+        threading.Thread(target=read_loop, args=(server.app.test_client(), stop, latencies, torn))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    if publisher is None:
+        time.sleep(duration)
+    else:
+        publisher()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return 1000 * np.percentile(latencies, [50, 99, 100]), len(latencies), len(torn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=1000)
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--publishes', type=int, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Two runs with different universes, so every reload changes the ticker list
+    runs = []
+    for tickers in (args.tickers, args.tickers // 2):
+        backtester = Backtester(synthetic_ohlcv(args.bars, tickers, seed=args.seed), 1_000_000.0)
+        backtester.run(progress=False)
+        runs.append((backtester, backtester.portfolio()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['ARTEFACT_POLL_SECONDS'] = '0.05'
+        server = flask_client(tmp)
+        server.app.logger.setLevel(logging.ERROR)
+        server.FRONTEND_PATH = os.path.join(tmp, 'frontend_data')
+        server.WATCHER.interval = 0.05
+        exports = []
+
+        def export(i):
+            backtester, portfolio = runs[i % 2]
+            output_dir = staging_dir(server.FRONTEND_PATH)
+            start = time.perf_counter()
+            backtester.export_results(portfolio, save_path=output_dir, workers=1)
+            publish(server.FRONTEND_PATH, output_dir)
+            exports.append(time.perf_counter() - start)
+
+        export(0)
+        server.load_precomputed_data()
+        server.WATCHER.start()
+
+        def publisher():
+            for i in range(1, args.publishes + 1):
+                export(i)
+                # Let the watcher pick the version up and readers run against it
+                time.sleep(0.2)
+
+        idle = measure(server, args.readers, duration=2.0)
+        busy = measure(server, args.readers, duration=None, publisher=publisher)
+        print(f'{args.tickers}/{args.tickers // 2} tickers x {args.bars} bars, {args.readers} readers, '
+              f'{args.publishes} publishes (export + publish median {1000 * np.median(exports):.0f}ms)')
+        for name, (percentiles, reads, torn) in (('idle', idle), ('reloading', busy)):
+            p50, p99, worst = percentiles
+            print(f'  {name:<10s} {reads:6d} reads   p50 {p50:7.2f}ms  p99 {p99:7.2f}ms  max {worst:7.2f}ms   torn {torn}')
+
+
+if __name__ == '__main__':
+    main()
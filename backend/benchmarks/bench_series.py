@@ -0,0 +1,80 @@
+"""Payload size and query time of ranged / downsampled series as history grows.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_series --bars 5000 20000 100000 --points 1000
+
+For each history length, builds the equity-curve and candlestick pyramids
+and compares the full payload with a `points`-row query over the whole
+range and over its last tenth, timing each query with and without the
+pyramid (a single-level series).
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downsample
+from backtester.soq_backtester.charts import candlestick_payload
+from backtester.soq_backtester.serialization import dumps
+from benchmarks.suite import median_time
+
+
+def synthetic_series(bars: int, seed: int):
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64('1990-01-01', 'ns') + np.arange(bars) * np.timedelta64(1, 'D')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    spread = np.abs(rng.normal(0, 0.005, (bars, 2))) * close[:, None]
+    ohlc = np.stack([np.roll(close, 1), close + spread[:, 0], close - spread[:, 1], close], axis=1)
+    positions = np.where(rng.random(bars) < 0.5, 0, 10)
+    return dates, close, ohlc, positions
+
+
+def flat(series):
+    # The same series without coarser levels, so every query starts from the full history
+    series.levels = series.levels[:1]
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, nargs='+', default=[5000, 20000, 100000])
+    parser.add_argument('--points', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for bars in args.bars:
+        dates, close, ohlc, positions = synthetic_series(bars, args.seed)
+        labels = np.datetime_as_string(dates, unit='D').tolist()
+        line = downsample.LineSeries(dates, close)
+        candles = downsample.OHLCSeries(dates, ohlc, positions)
+        build = median_time(lambda: (downsample.LineSeries(dates, close), downsample.OHLCSeries(dates, ohlc, positions)), 1)
+
+        full_line = dumps([{'date': d, 'equity': v} for d, v in zip(labels, close.tolist())])
+        full_chart = dumps(candlestick_payload('SYN', labels, ohlc, positions))
+        print(f'{bars} bars: pyramid levels {[len(level) for level in line.levels]}, built in {1000 * build:.1f}ms; '
+              f'full payload equity {len(full_line) / 1024:.0f}KiB, chart {len(full_chart) / 1024:.0f}KiB')
+
+        flat_line = flat(downsample.LineSeries(dates, close))
+        flat_candles = flat(downsample.OHLCSeries(dates, ohlc, positions))
+        for name, start in (('whole range', None), ('last tenth', dates[-bars // 10])):
+            rows = line.query(start, None, args.points)
+            first, bucketed, held = candles.query(start, None, args.points)
+            line_body = dumps([{'date': labels[i], 'equity': close[i]} for i in rows.tolist()])
+            chart_body = dumps(candlestick_payload('SYN', [labels[i] for i in first.tolist()], bucketed, held))
+            timings = [
+                median_time(lambda: series.query(start, None, args.points), args.repeat)
+                for series in (line, flat_line, candles, flat_candles)
+            ]
+            print(f'  {name:<12s} equity {len(rows):5d} rows {len(line_body) / 1024:6.0f}KiB '
+                  f'lttb {1000 * timings[0]:7.2f}ms (no pyramid {1000 * timings[1]:7.2f}ms) | '
+                  f'chart {len(first):5d} bars {len(chart_body) / 1024:6.0f}KiB '
+                  f'ohlc {1000 * timings[2]:6.2f}ms (no pyramid {1000 * timings[3]:6.2f}ms)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Login latency of the user store as the number of users grows.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_users --users 100 1000 10000 100000 --logins 500
+
+Users are inserted with a single-iteration pbkdf2 hash so the timings show
+the storage cost rather than the password hash. --legacy also times the
+old read_csv / to_csv implementation for comparison, and --workers runs
+concurrent signups and logins from several processes and checks that no
+update was lost.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from werkzeug.security import check_password_hash, generate_password_hash
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+FAST_HASH = 'pbkdf2:sha256:1'
+
+
+def populate(db_file: str, n_users: int, password_hash: str):
+    conn = utils.get_connection(db_file)
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT INTO users (email, name, password, is_logged_in) VALUES (?, ?, ?, 0)',
+        ((f'user{i}@example.com', f'User {i}', password_hash) for i in range(n_users)),
+    )
+    conn.execute('COMMIT')
+
+
+def legacy_login(csv_file: str, email: str, password: str):
+    # The previous utils.authenticate_user: full read, scan and rewrite per call
+    df = pd.read_csv(csv_file)
+    user = df[df['email'] == email]
+    if user.empty or not check_password_hash(user.iloc[0]['password'], password):
+        return False
+    df.loc[df['email'] == email, 'is_logged_in'] = True
+    df.to_csv(csv_file, index=False)
+    return True
+
+
+def latencies(fn, emails) -> np.ndarray:
+    times = []
+    for email in emails:
+        start = time.perf_counter()
+        ok = fn(email)
+        times.append(time.perf_counter() - start)
+        assert ok, email
+    return np.array(times) * 1000
+
+
+def _concurrent_worker(db_file: str, worker: int, count: int) -> int:
+    utils.DB_FILE = db_file
+    for i in range(count):
+        email = f'w{worker}-{i}@example.com'
+        utils.create_user(f'W{worker} {i}', email, 'secret')
+        ok, _ = utils.authenticate_user(email, 'secret')
+        assert ok, email
+    return count
+
+
+def concurrent_check(workers: int, per_worker: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'users.db')
+        utils.get_connection(db_file, csv_file=os.path.join(tmp, 'missing.csv'))
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            created = sum(pool.map(_concurrent_worker, [db_file] * workers, range(workers), [per_worker] * workers))
+        elapsed = time.perf_counter() - start
+        rows, logged_in = utils.get_connection(db_file).execute(
+            'SELECT COUNT(*), SUM(is_logged_in) FROM users').fetchone()
+    status = 'OK' if rows == logged_in == created else 'LOST UPDATES'
+    print(f'{workers} processes x {per_worker} signup+login: {rows}/{created} rows, '
+          f'{logged_in} logged in, {elapsed:.2f}s -> {status}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--logins', type=int, default=500)
+    parser.add_argument('--legacy', action='store_true', help='also time the CSV implementation')
+    parser.add_argument('--legacy-max', type=int, default=10000, help='largest user count for --legacy')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--per-worker', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    password_hash = generate_password_hash('secret', method=FAST_HASH)
+
+    for n_users in args.users:
+        emails = [f'user{rng.randrange(n_users)}@example.com' for _ in range(args.logins)]
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, 'users.db')
+            utils.get_connection(db_file, csv_file=os.path.join(tmp, 'missing.csv'))
+            populate(db_file, n_users, password_hash)
+            utils.DB_FILE = db_file
+            sqlite_ms = latencies(lambda email: utils.authenticate_user(email, 'secret')[0], emails)
+            line = (f'{n_users:>8d} users  sqlite p50 {np.percentile(sqlite_ms, 50):7.3f}ms '
+                    f'p95 {np.percentile(sqlite_ms, 95):7.3f}ms')
+
+            if args.legacy and n_users <= args.legacy_max:
+                csv_file = os.path.join(tmp, 'users.csv')
+                users = utils.load_users()
+                users['is_logged_in'] = users['is_logged_in'].astype(bool)
+                users.to_csv(csv_file, index=False)
+                csv_ms = latencies(lambda email: legacy_login(csv_file, email, 'secret'), emails[:50])
+                line += f'   csv p50 {np.percentile(csv_ms, 50):8.3f}ms p95 {np.percentile(csv_ms, 95):8.3f}ms'
+        print(line)
+
+    if args.workers:
+        concurrent_check(args.workers, args.per_worker)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""A local stand-in SMTP server that accepts and counts messages.
+
+Enough of RFC 5321 for smtplib without STARTTLS or AUTH: point the app at
+it with SMTP_HOST=127.0.0.1, SMTP_PORT=<port>, SMTP_STARTTLS=0 and an
+empty EMAIL_PASS. The knobs imitate a real relay: `connect_delay` for the
+TLS handshake and login a fresh connection costs, `message_delay` per
+DATA, `drop_every` to hang up after that many messages on a connection,
+and `fail_first` to answer 451 to the first messages.
+
+    python -m benchmarks.smtp_sink --port 1025
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, connect_delay=0.0, message_delay=0.0, drop_every=0, fail_first=0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.drop_every = drop_every
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.attempts = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        sink = self.server
+        with sink.lock:
+            sink.connections += 1
+        time.sleep(sink.connect_delay)
+        self.reply('220 sink ESMTP')
+        delivered = 0
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 sink')
+            elif command.startswith('MAIL'):
+                recipients = []
+                self.reply('250 OK')
+            elif command.startswith('RCPT'):
+                recipients.append(line.decode().split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for raw in iter(self.rfile.readline, b''):
+                    if raw in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(raw)
+                time.sleep(sink.message_delay)
+                with sink.lock:
+                    sink.attempts += 1
+                    fail = sink.attempts <= sink.fail_first
+                    if not fail:
+                        sink.messages.append((recipients, b''.join(data)))
+                if fail:
+                    self.reply('451 Try again later')
+                    continue
+                self.reply('250 OK queued')
+                delivered += 1
+                if sink.drop_every and delivered % sink.drop_every == 0:
+                    return
+            elif command in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=1025)
+    parser.add_argument('--connect-delay', type=float, default=0.0)
+    parser.add_argument('--message-delay', type=float, default=0.0)
+    args = parser.parse_args()
+    sink = SMTPSink(args.port, args.connect_delay, args.message_delay)
+    print(f'SMTP sink listening on 127.0.0.1:{sink.port}')
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        print(f'{len(sink.messages)} messages received over {sink.connections} connections')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Scaling benchmarks for the engine, the export and the Flask endpoints.
+
+Run from the backend directory:
+
+    python -m benchmarks.suite --bars 500 1000 2000 --tickers 20 100 --output bench.json --plot bench.png
+    python -m benchmarks.suite --bars 500 1000 2000 --tickers 20 100 --baseline bench.json --threshold 0.25
+
+Every case is timed on the same seeded synthetic data for each
+(bars, tickers) point and the median of --repeat runs is kept. With
+--baseline the run exits non-zero if any case is more than --threshold
+slower than the stored result for the same point.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester.backtester import Backtester
+from benchmarks.synthetic import synthetic_ohlcv
+
+ENDPOINTS = ('/portfolio_summary', '/performance_metrics', '/returns_histogram', '/tickers', '/candlestick/{ticker}')
+
+
+def median_time(fn, repeat: int, warmup: int = 1) -> float:
+    # Warm-up calls absorb one-off costs such as vectorbt's numba compilation
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def flask_client(staging_dir: str):
+    # app builds its job queue and result cache on import; keep them out of the tree
+    os.environ.setdefault('RESULT_CACHE_DIR', os.path.join(staging_dir, 'result_cache'))
+    import app as server
+    return server
+
+
+def bench_point(n_bars: int, n_tickers: int, args, server=None) -> dict:
+    data = synthetic_ohlcv(n_bars, n_tickers, seed=args.seed)
+    timings = {}
+
+    def run():
+        backtester = Backtester(data, 1_000_000.0)
+        backtester.run(progress=False)
+        return backtester
+
+    timings['run'] = median_time(run, args.repeat)
+    backtester = run()
+    portfolio = backtester.portfolio()
+
+    if not args.skip_vectorbt:
+        timings['vectorbt_run'] = median_time(backtester.vectorbt_run, args.repeat)
+
+    with tempfile.TemporaryDirectory() as save_path:
+        def export():
+            backtester.export_results(portfolio, save_path=save_path, workers=args.workers)
+
+        timings['export_results'] = median_time(export, args.repeat)
+
+        if server is not None:
+            server.FRONTEND_PATH = save_path
+            server.CHART_CACHE.clear()
+            server.load_precomputed_data()
+            client = server.app.test_client()
+            for endpoint in ENDPOINTS:
+                url = endpoint.format(ticker=backtester.tickers[0])
+
+                def request():
+                    for _ in range(args.requests):
+                        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+                        assert response.status_code == 200, (url, response.status_code)
+
+                timings[f'GET {endpoint}'] = median_time(request, args.repeat) / args.requests
+
+    return timings
+
+
+def scaling_exponents(results: list) -> dict:
+    """Log-log slope of time against bars (at each ticker count) and against tickers (at each bar count)"""
+    exponents = {}
+    for case in sorted({r['case'] for r in results}):
+        rows = [r for r in results if r['case'] == case]
+        for axis, other in (('bars', 'tickers'), ('tickers', 'bars')):
+            for fixed in sorted({r[other] for r in rows}):
+                points = sorted((r[axis], r['seconds']) for r in rows if r[other] == fixed)
+                if len(points) < 2:
+                    continue
+                x, y = np.log([p[0] for p in points]), np.log([max(p[1], 1e-9) for p in points])
+                exponents[f'{case} vs {axis} ({other}={fixed})'] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def regressions(results: list, baseline: list, threshold: float) -> list:
+    reference = {(r['case'], r['bars'], r['tickers']): r['seconds'] for r in baseline}
+    failures = []
+    for r in results:
+        before = reference.get((r['case'], r['bars'], r['tickers']))
+        if before and r['seconds'] > before * (1 + threshold):
+            failures.append(
+                f"{r['case']} @ {r['bars']}x{r['tickers']}: {r['seconds']:.4f}s vs baseline {before:.4f}s "
+                f"({r['seconds'] / before - 1:+.0%})"
+            )
+    return failures
+
+
+def plot_curves(results: list, path: str):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    cases = sorted({r['case'] for r in results})
+    fig, axes = plt.subplots(len(cases), 1, figsize=(7, 3 * len(cases)), squeeze=False)
+    for ax, case in zip(axes[:, 0], cases):
+        rows = [r for r in results if r['case'] == case]
+        for n_tickers in sorted({r['tickers'] for r in rows}):
+            points = sorted((r['bars'], r['seconds']) for r in rows if r['tickers'] == n_tickers)
+            ax.loglog(*zip(*points), marker='o', label=f'{n_tickers} tickers')
+        ax.set_title(case)
+        ax.set_xlabel('bars')
+        ax.set_ylabel('seconds')
+        ax.legend(fontsize='small')
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, nargs='+', default=[250, 500, 1000])
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=20, help='requests per endpoint timing')
+    parser.add_argument('--workers', type=int, default=1, help='export_results chart workers')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-vectorbt', action='store_true')
+    parser.add_argument('--skip-flask', action='store_true')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--plot', help='write scaling curves to this image (needs matplotlib)')
+    parser.add_argument('--baseline', help='results JSON from an earlier run to check against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown versus the baseline')
+    args = parser.parse_args()
+
+    if not args.skip_vectorbt:
+        try:
+            import vectorbt  # noqa: F401
+        except ImportError:
+            print('vectorbt is not installed, skipping vectorbt_run')
+            args.skip_vectorbt = True
+
+    with tempfile.TemporaryDirectory() as staging_dir:
+        server = None if args.skip_flask else flask_client(staging_dir)
+        results = []
+        for n_bars in args.bars:
+            for n_tickers in args.tickers:
+                timings = bench_point(n_bars, n_tickers, args, server)
+                for case, seconds in timings.items():
+                    results.append({'case': case, 'bars': n_bars, 'tickers': n_tickers, 'seconds': seconds})
+                    print(f'{n_bars:>7d} bars x {n_tickers:<5d} {case:<28s} {1000 * seconds:10.3f}ms')
+
+    exponents = scaling_exponents(results)
+    print('\nScaling exponents (1.0 = linear):')
+    for name, slope in exponents.items():
+        print(f'  {name:<52s} {slope:6.2f}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'seed': args.seed,
+                'results': results,
+                'scaling': exponents,
+            }, f, indent=2)
+    if args.plot:
+        plot_curves(results, args.plot)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f)['results'], args.threshold)
+        if failures:
+            print(f'\n{len(failures)} regression(s) above {args.threshold:.0%}:')
+            for failure in failures:
+                print('  ' + failure)
+            sys.exit(1)
+        print(f'\nNo regressions above {args.threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
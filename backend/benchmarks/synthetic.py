@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def synthetic_ohlcv(n_bars: int, n_tickers: int, seed: int = 0, start: str = '2000-01-03') -> pd.DataFrame:
+    """Seeded random-walk prices in the (ticker, field) column layout of multi_level_ohlcv.csv"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, periods=n_bars)
+    tickers = [f'SYN{i:04d}' for i in range(n_tickers)]
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_bars, n_tickers)), axis=0))
+    open_ = close * np.exp(rng.normal(0, 0.005, (n_bars, n_tickers)))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, (n_bars, n_tickers)))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, (n_bars, n_tickers)))
+    volume = rng.integers(1_000, 1_000_000, (n_bars, n_tickers)).astype(np.float64)
+
+    values = np.stack([open_, high, low, close, volume], axis=2).reshape(n_bars, -1)
+    columns = pd.MultiIndex.from_product([tickers, FIELDS])
+    return pd.DataFrame(values, index=index, columns=columns)
@@ -0,0 +1,210 @@
+"""Date-range queries and downsampling over in-memory NumPy series.
+
+LineSeries picks representative rows of a line (the equity curve) with
+LTTB, largest-triangle-three-buckets. OHLCSeries merges candlesticks
+into wider ones. Each builds a pyramid of coarser levels once, every
+level PYRAMID_FACTOR times smaller than the one below, and a query
+starts from the coarsest level that still has `points` rows in the
+requested range. The work per request is then bounded by the number of
+points asked for rather than the length of the history.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+PYRAMID_FACTOR = 4
+# Levels stop before they get smaller than this
+MIN_LEVEL_POINTS = 256
+
+
+def parse_date(value):
+    """numpy datetime64[ns] from an ISO date string; ValueError when malformed"""
+    return np.datetime64(value, 'ns')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n points of (x, y) that LTTB keeps; the first and last are always kept"""
+    size = len(y)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1][:max(n, 0)])
+
+    # n - 2 buckets over the interior points; bucket i spans edges[i]:edges[i + 1]
+    edges = np.append(1 + np.floor(np.arange(n - 1) * ((size - 2) / (n - 2))).astype(np.int64), size)
+    edges[n - 2] = size - 1
+    # Third vertex of bucket i's triangles: the mean of bucket i + 1 (the last point for the final bucket)
+    counts = np.diff(edges)
+    avg_x = (np.add.reduceat(x.astype(np.float64), edges[:-1]) / counts)[1:].tolist()
+    avg_y = (np.add.reduceat(y.astype(np.float64), edges[:-1]) / counts)[1:].tolist()
+    # Plain floats: after the pyramid a bucket is a handful of points, where NumPy's per-call cost dominates
+    xs, ys = x.tolist(), y.tolist()
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i, (start, end) in enumerate(zip(edges[:-2].tolist(), edges[1:-1].tolist())):
+        xa, ya = xs[a], ys[a]
+        dx, dy = xa - avg_x[i], avg_y[i] - ya
+        best, a = -1.0, start
+        for j in range(start, end):
+            # Twice the triangle's area; NaN never compares greater, so missing values are skipped
+            area = abs(dx * (ys[j] - ya) - (xa - xs[j]) * dy)
+            if area > best:
+                best, a = area, j
+        keep[i + 1] = a
+    return keep
+
+
+class LineSeries:
+    """A line over sorted dates, downsampled with LTTB on `values`.
+
+    Levels are index arrays into the full series, each the LTTB selection
+    of the level below, so every returned index is a real row.
+    """
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.values = np.asarray(values, dtype=np.float64)
+        self._x = self.dates.astype(np.int64).astype(np.float64)
+        self.levels = [np.arange(len(self.values))]
+        while len(self.levels[-1]) // PYRAMID_FACTOR >= MIN_LEVEL_POINTS:
+            level = self.levels[-1]
+            self.levels.append(level[lttb(self._x[level], self.values[level], len(level) // PYRAMID_FACTOR)])
+
+    def __len__(self):
+        return len(self.values)
+
+    def query(self, start=None, end=None, points: int = None) -> np.ndarray:
+        """Row indices within [start, end] (both inclusive), at most `points` of them"""
+        lo = 0 if start is None else np.searchsorted(self.dates, start, side='left')
+        hi = len(self) if end is None else np.searchsorted(self.dates, end, side='right')
+        for level in reversed(self.levels):
+            rows = level[np.searchsorted(level, lo):np.searchsorted(level, hi)]
+            if hi > lo:
+                # Coarse levels may have skipped the rows at the range edges
+                rows = np.union1d(rows, [lo, hi - 1])
+            # The loop ends on the full series when no coarser level has enough rows
+            if points is not None and len(rows) >= points:
+                break
+        if points is None or len(rows) <= points:
+            return rows
+        return rows[lttb(self._x[rows], self.values[rows], points)]
+
+
+def _bucket_starts(size: int, points: int) -> np.ndarray:
+    return np.unique(np.floor(np.linspace(0, size, points, endpoint=False)).astype(np.int64))
+
+
+def _first_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Per run starts[i]:ends[i], the first non-NaN value (NaN when there is none)"""
+    valid = np.flatnonzero(~np.isnan(values))
+    out = np.full(len(starts), np.nan)
+    k = np.searchsorted(valid, starts)
+    found = k < len(valid)
+    found[found] = valid[k[found]] < ends[found]
+    out[found] = values[valid[k[found]]]
+    return out
+
+
+def _last_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Per run starts[i]:ends[i], the last non-NaN value (NaN when there is none)"""
+    valid = np.flatnonzero(~np.isnan(values))
+    out = np.full(len(starts), np.nan)
+    k = np.searchsorted(valid, ends) - 1
+    found = k >= 0
+    found[found] = valid[k[found]] >= starts[found]
+    out[found] = values[valid[k[found]]]
+    return out
+
+
+class OHLCSeries:
+    """Candlesticks over sorted dates, downsampled by merging runs of bars.
+
+    A merged bar opens at the first open and closes at the last close of
+    its run, ignoring missing prices, spans the run's high and low, and
+    keeps the position held on the run's last bar. Buckets of a coarse
+    level are fixed, so a range edge can be off by up to one output bar.
+    """
+
+    def __init__(self, dates: np.ndarray, ohlc: np.ndarray, positions: np.ndarray):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        ohlc = np.asarray(ohlc, dtype=np.float64)
+        base = {
+            'first': np.arange(len(self.dates)),
+            'open': ohlc[:, 0], 'high': ohlc[:, 1], 'low': ohlc[:, 2], 'close': ohlc[:, 3],
+            'position': np.asarray(positions),
+        }
+        self.levels = [base]
+        while len(self.levels[-1]['first']) // PYRAMID_FACTOR >= MIN_LEVEL_POINTS:
+            level = self.levels[-1]
+            self.levels.append(self._merge(level, np.arange(0, len(level['first']), PYRAMID_FACTOR)))
+
+    def __len__(self):
+        return len(self.dates)
+
+    @staticmethod
+    def _merge(level: dict, starts: np.ndarray) -> dict:
+        size = len(level['first'])
+        ends = np.append(starts[1:], size)
+        merged = {
+            'first': level['first'][starts],
+            # fmax/fmin skip NaN unless the whole run is missing
+            'high': np.fmax.reduceat(level['high'], starts),
+            'low': np.fmin.reduceat(level['low'], starts),
+            'position': level['position'][ends - 1],
+        }
+        merged['open'] = _first_valid(level['open'], starts, ends)
+        merged['close'] = _last_valid(level['close'], starts, ends)
+        return merged
+
+    def query(self, start=None, end=None, points: int = None):
+        """(first row index, bars x 4 ohlc, positions) of at most `points` bars within [start, end]"""
+        lo = 0 if start is None else np.searchsorted(self.dates, start, side='left')
+        hi = len(self) if end is None else np.searchsorted(self.dates, end, side='right')
+        for level in reversed(self.levels):
+            b0, b1 = np.searchsorted(level['first'], lo), np.searchsorted(level['first'], hi)
+            if points is not None and b1 - b0 >= points:
+                break
+        window = {name: values[b0:b1] for name, values in level.items()}
+        if points is not None and b1 - b0 > points:
+            window = self._merge(window, _bucket_starts(b1 - b0, points))
+        ohlc = np.stack([window['open'], window['high'], window['low'], window['close']], axis=1)
+        return window['first'], ohlc, window['position']
+
+
+class SeriesCache:
+    """Bounded LRU of series built from files, rebuilt when the file's mtime or size changes.
+
+    get(path, *member) calls build(path, *member), so one file can hold
+    several series (the tickers of a chart store) that share its version.
+    """
+
+    def __init__(self, build, maxsize=64):
+        self.build = build
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, *member):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = (path,) + member
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        series = self.build(path, *member)
+        with self._lock:
+            self._entries[key] = (version, series)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return series
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
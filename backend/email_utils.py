@@ -1,25 +1,45 @@
+import atexit
 import os
+import queue
 import smtplib
+import threading
+import time
+from collections import deque
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
+import numpy as np
+
 load_dotenv()
 
 EMAIL = os.getenv("EMAIL")
 EMAIL_PASS = os.getenv("EMAIL_PASS")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+# Off for a local stand-in server that speaks plain SMTP
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") not in ("0", "false", "False")
 
-def send_email(to_email, subject, body):
+
+def build_message(to_email, subject, body, sender=None):
     msg = MIMEMultipart()
-    msg['From'] = EMAIL
+    msg['From'] = sender or EMAIL
     msg['To'] = to_email
     msg['Subject'] = subject
     msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def send_email(to_email, subject, body):
+    """Send one message on a fresh connection and wait for it; MAIL_QUEUE.enqueue is the non-blocking path"""
+    msg = build_message(to_email, subject, body)
 
     try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(EMAIL, EMAIL_PASS)
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+        if SMTP_STARTTLS:
+            server.starttls()
+        if EMAIL_PASS:
+            server.login(EMAIL, EMAIL_PASS)
         server.send_message(msg)
         server.quit()
         print(f"Email sent to {to_email}")
@@ -27,3 +47,199 @@ def send_email(to_email, subject, body):
     except Exception as e:
         print(f"Error: {e}")
         return False
+
+
+def _is_permanent(error):
+    # 5xx replies (bad recipient, rejected sender, auth failure) will not succeed on a retry
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and code >= 500
+
+
+class MailQueue:
+    """Background SMTP sender with persistent connections.
+
+    enqueue() only puts the message on a bounded queue. `workers` threads
+    each keep one logged-in SMTP connection open and reuse it across
+    messages, reconnecting when the server has dropped it or it has sat
+    idle longer than `idle_timeout`. Transient failures are retried up to
+    `max_retries` times with exponential backoff; 5xx replies are not.
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, username=EMAIL, password=EMAIL_PASS,
+                 starttls=SMTP_STARTTLS, workers=1, max_queue=1000, max_retries=3,
+                 backoff=1.0, idle_timeout=60.0, timeout=30.0, window=1000):
+        self.host, self.port = host, port
+        self.username, self.password = username, password
+        self.starttls = starttls
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._retry_timers = set()
+        self._closing = False
+        self._send_latencies = deque(maxlen=window)
+        self._delivery_latencies = deque(maxlen=window)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.connects = 0
+
+    def enqueue(self, to_email, subject, body) -> bool:
+        """Queue a plain-text message; False when the queue is full or the sender is shut down"""
+        if self._closing:
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait((build_message(to_email, subject, body, self.username), 0, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _start(self):
+        # Threads start on first use so a forked (e.g. Gunicorn) worker gets its own
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._worker, name=f'mail-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.password:
+            server.login(self.username, self.password)
+        with self._lock:
+            self.connects += 1
+        return server
+
+    @staticmethod
+    def _disconnect(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _worker(self):
+        server, last_used = None, 0.0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            msg, attempt, enqueued_at = item
+            start = time.perf_counter()
+            try:
+                if server is not None and start - last_used > self.idle_timeout:
+                    # The server has most likely timed us out; a NOOP is cheaper than a failed send
+                    try:
+                        server.noop()
+                    except (smtplib.SMTPException, OSError):
+                        server.close()
+                        server = None
+                if server is None:
+                    server = self._connect()
+                server.send_message(msg)
+            except (smtplib.SMTPException, OSError) as e:
+                # The session state after an error is unknown, so the next attempt starts afresh
+                if server is not None:
+                    server.close()
+                    server = None
+                self._failed(msg, attempt, enqueued_at, e)
+            else:
+                now = time.perf_counter()
+                with self._lock:
+                    self.sent += 1
+                    self._send_latencies.append(now - start)
+                    self._delivery_latencies.append(now - enqueued_at)
+            finally:
+                last_used = time.perf_counter()
+                self._queue.task_done()
+        if server is not None:
+            self._disconnect(server)
+
+    def _failed(self, msg, attempt, enqueued_at, error):
+        if attempt >= self.max_retries or _is_permanent(error) or self._closing:
+            with self._lock:
+                self.failed += 1
+            print(f"Error: giving up on email to {msg['To']} after {attempt + 1} attempts: {error}")
+            return
+        with self._lock:
+            self.retried += 1
+        # Waiting on a timer keeps the worker free for the rest of the queue
+        timer = threading.Timer(self.backoff * 2 ** attempt, self._requeue, ((msg, attempt + 1, enqueued_at),))
+        timer.daemon = True
+        with self._lock:
+            self._retry_timers.add(timer)
+        timer.start()
+
+    def _requeue(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+        # Only after the put, so join() never sees the message in neither place
+        with self._lock:
+            self._retry_timers.discard(threading.current_thread())
+
+    def join(self, timeout=None) -> bool:
+        """Wait until the queue and any pending retries are empty; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                idle = not self._retry_timers and self._queue.unfinished_tasks == 0
+            if idle:
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+
+    def close(self, timeout=10.0):
+        """Deliver what is queued, then stop the workers and close their connections"""
+        self.join(timeout)
+        self._closing = True
+        with self._lock:
+            threads = [t for t in self._threads if t.is_alive()]
+            for timer in self._retry_timers:
+                timer.cancel()
+            self._retry_timers.clear()
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            send = np.array(self._send_latencies) * 1000
+            delivery = np.array(self._delivery_latencies) * 1000
+            report = {
+                'queue_depth': self._queue.qsize(),
+                'pending_retries': len(self._retry_timers),
+                'sent': self.sent,
+                'failed': self.failed,
+                'retried': self.retried,
+                'dropped': self.dropped,
+                'connects': self.connects,
+            }
+        for name, ms in (('send', send), ('delivery', delivery)):
+            report[f'{name}_p50_ms'] = float(np.percentile(ms, 50)) if len(ms) else None
+            report[f'{name}_p95_ms'] = float(np.percentile(ms, 95)) if len(ms) else None
+        return report
+
+
+MAIL_QUEUE = MailQueue(
+    workers=int(os.getenv("MAIL_WORKERS", 1)),
+    max_queue=int(os.getenv("MAIL_QUEUE", 1000)),
+    max_retries=int(os.getenv("MAIL_RETRIES", 3)),
+)
+atexit.register(MAIL_QUEUE.close)
@@ -0,0 +1,51 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+class CachedFile:
+    __slots__ = ('body', 'etag', 'last_modified', 'mtime_ns', 'size')
+
+    def __init__(self, body, mtime_ns, size):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = datetime.fromtimestamp(mtime_ns / 1e9, tz=timezone.utc)
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+
+class FileCache:
+    """Bounded LRU of file contents, revalidated against the file's mtime and size on every hit"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+
+        with open(path, 'rb') as f:
+            entry = CachedFile(f.read(), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
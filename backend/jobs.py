@@ -0,0 +1,230 @@
+import inspect
+import math
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from backtester.soq_backtester import script as strategies
+from backtester.soq_backtester.backtester import Backtester
+from backtester.soq_backtester.data_store import OHLCVStore, cached_source_sha1
+from result_cache import result_key
+
+# Number of progress messages a job sends over its whole run
+PROGRESS_UPDATES = 200
+
+# Set in each worker process by _init_worker
+_PROGRESS_QUEUE = None
+
+
+def _init_worker(progress_queue):
+    global _PROGRESS_QUEUE
+    _PROGRESS_QUEUE = progress_queue
+
+
+def validate_params(params):
+    """Raise ValueError unless params has the shape run_backtest_job and result_key expect"""
+    if not isinstance(params, dict):
+        raise ValueError('Parameters must be a JSON object')
+    # Only strategy classes, not whatever else script.py imports (np, pd, Tuple, ...)
+    name = params.get('strategy', 'Strategy')
+    strategy_cls = getattr(strategies, name, None) if isinstance(name, str) else None
+    if not (isinstance(strategy_cls, type) and callable(getattr(strategy_cls, 'get_signals', None))):
+        raise ValueError(f"Unknown strategy: {name}")
+    if not isinstance(params.get('strategy_params', {}), dict):
+        raise ValueError('strategy_params must be an object')
+    tickers = params.get('tickers')
+    if tickers is not None and not (isinstance(tickers, list) and all(isinstance(t, str) for t in tickers)):
+        raise ValueError('tickers must be a list of strings')
+    value = params.get('initial_value', 200000.0)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+        raise ValueError('initial_value must be a positive number')
+    for field in ('start', 'end'):
+        if params.get(field) is not None:
+            try:
+                pd.Timestamp(params[field])
+            except (TypeError, ValueError):
+                raise ValueError(f'{field} must be a date, got {params[field]!r}') from None
+
+
+def run_backtest_job(job_id, params, data_path, output_dir):
+    """Worker-process entry point: run one backtest, export it into output_dir and return the data's SHA-1"""
+    store = OHLCVStore.from_csv(data_path)
+    data = store.load(start=params.get('start'), end=params.get('end'), tickers=params.get('tickers'))
+    if data.shape[1] == 0 or len(data) < 2:
+        raise ValueError('No price data for the requested date range and tickers')
+
+    strategy_cls = getattr(strategies, params.get('strategy', 'Strategy'))
+    strategy = strategy_cls(**params.get('strategy_params', {}))
+    backtester = Backtester(data, float(params.get('initial_value', 200000.0)), strategy=strategy)
+
+    step = max(1, (len(data) - 1) // PROGRESS_UPDATES)
+
+    def report(done, total):
+        if done % step == 0 or done == total:
+            _PROGRESS_QUEUE.put((job_id, done, total))
+
+    backtester.run(progress=False, on_progress=report)
+    backtester.export_results(backtester.portfolio(), save_path=output_dir, workers=1)
+    return store.meta['source_sha1']
+
+
+class BacktestJobs:
+    """Runs backtests in a process pool and tracks their status for the API.
+
+    Jobs are exported into their own staging directory; publish(output_dir)
+    is called from a background thread once a job finishes successfully.
+    With a result_cache, a request whose inputs were already run is
+    published straight from the cache without starting a worker.
+    Finished and failed jobs are forgotten job_ttl seconds after they end,
+    and beyond the newest max_finished of them, after which get() returns None.
+    """
+
+    TERMINAL = ('finished', 'failed')
+
+    def __init__(self, data_path, staging_dir, publish, max_workers=1, result_cache=None,
+                 job_ttl=3600.0, max_finished=1000):
+        self.data_path = data_path
+        self.staging_dir = staging_dir
+        self.publish = publish
+        self.max_workers = max_workers
+        self.result_cache = result_cache
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._changed = threading.Condition()
+        self._publish_lock = threading.Lock()
+        self._pool = None
+        self._progress_queue = None
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            # spawn rather than fork: the server process has threads (and their locks) running
+            context = multiprocessing.get_context('spawn')
+            self._progress_queue = context.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._progress_queue,),
+            )
+            threading.Thread(target=self._read_progress, daemon=True).start()
+
+    def result_key(self, params, fingerprint=None):
+        """Cache key of params, or None when the data's SHA-1 is not known without reading the CSV.
+
+        Called on the request thread, so the CSV is only stat()ed; after a
+        change the worker's conversion records the new SHA-1 (see _finish).
+        """
+        fingerprint = fingerprint or cached_source_sha1(self.data_path)
+        if fingerprint is None:
+            return None
+        return result_key(fingerprint, params, inspect.getsource(strategies))
+
+    def submit(self, params):
+        validate_params(params)
+
+        self._evict()
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'params': params,
+            'done': 0,
+            'total': None,
+            'error': None,
+            'cached': False,
+            'created': time.time(),
+            'finished': None,
+        }
+        output_dir = os.path.join(self.staging_dir, job_id)
+        key = self.result_key(params) if self.result_cache is not None else None
+        with self._changed:
+            self._jobs[job_id] = job
+
+        if key is not None and self.result_cache.get(key, output_dir):
+            try:
+                with self._publish_lock:
+                    self.publish(output_dir)
+            except Exception as e:
+                self._update(job_id, status='failed', error=str(e), finished=time.time())
+            else:
+                self._update(job_id, status='finished', cached=True, finished=time.time())
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+            return job_id
+
+        with self._changed:
+            self._ensure_pool()
+        future = self._pool.submit(run_backtest_job, job_id, params, self.data_path, output_dir)
+        future.add_done_callback(lambda f: self._finish(job_id, params, output_dir, key, f))
+        return job_id
+
+    def _evict(self):
+        """Drop terminal jobs past job_ttl and all but the newest max_finished of the rest"""
+        with self._changed:
+            finished = sorted(
+                (job['finished'], job_id) for job_id, job in self._jobs.items() if job['status'] in self.TERMINAL
+            )
+            expired = time.time() - self.job_ttl
+            drop = [job_id for ended, job_id in finished if ended < expired]
+            kept = len(finished) - len(drop)
+            if kept > self.max_finished:
+                drop += [job_id for _, job_id in finished[len(drop):len(drop) + kept - self.max_finished]]
+            for job_id in drop:
+                del self._jobs[job_id]
+            if drop:
+                # Wakes event streams still waiting on an evicted job
+                self._changed.notify_all()
+
+    def _update(self, job_id, **changes):
+        with self._changed:
+            self._jobs[job_id].update(changes)
+            self._changed.notify_all()
+
+    def _read_progress(self):
+        while True:
+            job_id, done, total = self._progress_queue.get()
+            with self._changed:
+                job = self._jobs.get(job_id)
+                # Progress can be read after the job's done-callback already ran (or it was evicted)
+                if job is not None and job['status'] not in self.TERMINAL:
+                    job.update(status='running', done=done, total=total)
+                    self._changed.notify_all()
+
+    def _finish(self, job_id, params, output_dir, key, future):
+        error = future.exception()
+        try:
+            if error is None:
+                if key is None and self.result_cache is not None:
+                    key = self.result_key(params, fingerprint=future.result())
+                if key is not None:
+                    self.result_cache.put(key, output_dir)
+                with self._publish_lock:
+                    self.publish(output_dir)
+        except Exception as e:
+            error = e
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        if error is None:
+            self._update(job_id, status='finished', finished=time.time())
+        else:
+            self._update(job_id, status='failed', error=str(error), finished=time.time())
+
+    def get(self, job_id):
+        self._evict()
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait_for_change(self, job_id, last, timeout=15.0):
+        """Block until the job differs from the `last` snapshot (or timeout) and return it, None once evicted"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._jobs.get(job_id) != last, timeout=timeout)
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
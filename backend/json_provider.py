@@ -0,0 +1,25 @@
+from flask.json.provider import JSONProvider
+
+from backtester.soq_backtester.serialization import BACKEND, dumps, loads
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON through backtester.soq_backtester.serialization (orjson when installed).
+
+    jsonify() then accepts NumPy values, Timestamps and NaN (sent as null)
+    and writes the body as bytes, without the str round trip.
+    """
+
+    backend = BACKEND
+    # Same default as Flask's own provider, so responses keep their key order
+    sort_keys = True
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype='application/json')
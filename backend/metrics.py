@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class LatencyMetrics:
+    """Request count, status codes and recent latencies per endpoint.
+
+    Latencies are kept in a fixed-size window per endpoint, so percentiles
+    reflect the last `window` requests and memory stays bounded.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint: str, status: int, seconds: float):
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {
+                    'count': 0,
+                    'statuses': {},
+                    'latencies': deque(maxlen=self.window),
+                }
+            entry['count'] += 1
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            entry['latencies'].append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            entries = {name: (e['count'], dict(e['statuses']), np.array(e['latencies']))
+                       for name, e in self._endpoints.items()}
+        report = {}
+        for name, (count, statuses, latencies) in sorted(entries.items()):
+            ms = latencies * 1000
+            report[name] = {
+                'count': count,
+                'statuses': {str(code): n for code, n in sorted(statuses.items())},
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'p99_ms': float(np.percentile(ms, 99)),
+                'max_ms': float(ms.max()),
+            }
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def install(self, app):
+        """Time every request of a Flask app by its URL rule"""
+        from flask import g, request
+
+        @app.before_request
+        def _start_timer():
+            g._metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _record(response):
+            start = g.pop('_metrics_start', None)
+            if start is not None:
+                rule = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+                self.record(f'{request.method} {rule}', response.status_code, time.perf_counter() - start)
+            return response
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+def result_key(data_fingerprint: str, params: dict, strategy_source: str) -> str:
+    """Content address of a backtest: the data file, the requested slice and the strategy code"""
+    tickers = params.get('tickers')
+    inputs = {
+        'data': data_fingerprint,
+        'start': params.get('start'),
+        'end': params.get('end'),
+        # The store returns columns in file order, so the requested order does not matter
+        'tickers': sorted(tickers) if tickers is not None else None,
+        'initial_value': float(params.get('initial_value', 200000.0)),
+        'strategy': params.get('strategy', 'Strategy'),
+        'strategy_params': params.get('strategy_params', {}),
+        'strategy_source': strategy_source,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def link_tree(src: str, dst: str) -> None:
+    """Copy a directory tree using hard links where the filesystem allows it.
+
+    Exported files are only ever replaced as a whole, never edited in place,
+    so sharing inodes between the cache and the published directory is safe.
+    """
+    try:
+        shutil.copytree(src, dst, copy_function=os.link)
+    except OSError:
+        shutil.rmtree(dst, ignore_errors=True)
+        shutil.copytree(src, dst)
+
+
+class ResultCache:
+    """Exported backtest results stored under their result_key, evicted least recently used first.
+
+    Each entry is a complete export directory (portfolio summary, metrics,
+    histogram and charts). max_bytes bounds the total size on disk.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 2 << 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+        # Sizes and last-use times are rebuilt from disk; the directory mtime is the last use
+        self._entries = {}
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.endswith('.tmp'):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.isdir(path):
+                self._entries[name] = (os.stat(path).st_mtime, _tree_size(path))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._entries.values())
+
+    def get(self, key: str, dst: str) -> bool:
+        """Materialise the entry for key at dst; returns False on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            now = time.time()
+            os.utime(self._path(key), (now, now))
+            self._entries[key] = (now, self._entries[key][1])
+            self.hits += 1
+            # Linked while holding the lock so eviction cannot remove the entry mid-copy
+            link_tree(self._path(key), dst)
+        return True
+
+    def put(self, key: str, src: str) -> None:
+        """Store a copy of the export directory src under key"""
+        tmp = self._path(key) + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        link_tree(src, tmp)
+        size = _tree_size(tmp)
+
+        with self._lock:
+            if key in self._entries:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return
+            os.replace(tmp, self._path(key))
+            self._entries[key] = (time.time(), size)
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(size for _, size in self._entries.values())
+        for key, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            del self._entries[key]
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                shutil.rmtree(self._path(key), ignore_errors=True)
+            self._entries.clear()
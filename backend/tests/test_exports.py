@@ -0,0 +1,120 @@
+"""Exports written through the alternative run paths must match a plain full export.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtester.soq_backtester import backtester as backtester_module
+from backtester.soq_backtester.artefacts import current_version
+from backtester.soq_backtester.backtester import Backtester, run_incremental
+from backtester.soq_backtester.script import Strategy
+from backtester.soq_backtester.streaming import StreamingBacktester
+from benchmarks.synthetic import synthetic_ohlcv
+
+INITIAL_VALUE = 1_000_000.0
+
+
+def windowed_strategy():
+    strategy = Strategy()
+    strategy.lookback = 10
+    return strategy
+
+
+def export(backtester, portfolio, path, **kwargs):
+    backtester.export_results(portfolio, save_path=str(path), workers=1, **kwargs)
+    return path
+
+
+def test_streaming_export_writes_trades(tmp_path):
+    data = synthetic_ohlcv(200, 4, seed=3)
+    backtester = Backtester(data, INITIAL_VALUE, strategy=windowed_strategy())
+    backtester.run(progress=False)
+    chunks = (data.iloc[start:start + 50] for start in range(0, len(data), 50))
+    streaming = StreamingBacktester(INITIAL_VALUE, str(tmp_path / 'history'), strategy=windowed_strategy())
+    streaming.run(chunks, progress=False)
+
+    portfolio = streaming.portfolio(backtester.open_prices, backtester.close_prices)
+    streamed = export(backtester, portfolio, tmp_path / 'streamed')
+    expected = export(backtester, backtester.portfolio(), tmp_path / 'expected')
+    trades = pd.read_csv(streamed / 'trades.csv')
+    assert len(trades) > 0
+    pd.testing.assert_frame_equal(trades, pd.read_csv(expected / 'trades.csv'))
+
+
+def tree(path):
+    files = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            full = os.path.join(root, name)
+            with open(full, 'rb') as f:
+                files[os.path.relpath(full, path)] = f.read()
+    return files
+
+
+def full_export(data, path):
+    backtester = Backtester(data, INITIAL_VALUE)
+    backtester.run(progress=False)
+    return tree(export(backtester, backtester.portfolio(), path))
+
+
+def test_resumed_incremental_export_matches_full_export(tmp_path):
+    data = synthetic_ohlcv(200, 4, seed=4)
+    first = Backtester(data.iloc[:140], INITIAL_VALUE)
+    first.run(progress=False)
+    export(first, first.portfolio(), tmp_path / 'incremental')
+    first.save_checkpoint(str(tmp_path / 'checkpoint'))
+
+    resumed = Backtester.resume(data, str(tmp_path / 'checkpoint'))
+    since = resumed.current_index
+    resumed.run(progress=False)
+    export(resumed, resumed.portfolio(), tmp_path / 'incremental', since=since)
+    assert tree(tmp_path / 'incremental') == full_export(data, tmp_path / 'full')
+
+
+def test_run_incremental_publishes_and_checkpoints(tmp_path):
+    data = synthetic_ohlcv(200, 4, seed=5)
+    root, checkpoint = str(tmp_path / 'frontend_data'), str(tmp_path / 'checkpoint')
+    run_incremental(data.iloc[:120], root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    run_incremental(data.iloc[:160], root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    run_incremental(data, root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    assert tree(current_version(root)) == full_export(data, tmp_path / 'full')
+    assert Backtester.resume(data, checkpoint).current_index == len(data)
+
+
+def test_failed_publish_leaves_checkpoint_behind(tmp_path, monkeypatch):
+    data = synthetic_ohlcv(200, 4, seed=6)
+    root, checkpoint = str(tmp_path / 'frontend_data'), str(tmp_path / 'checkpoint')
+    run_incremental(data.iloc[:120], root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+
+    def failing_publish(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(backtester_module, 'publish', failing_publish)
+    with pytest.raises(OSError):
+        run_incremental(data.iloc[:160], root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    assert Backtester.resume(data, checkpoint).current_index == 120
+
+    monkeypatch.undo()
+    run_incremental(data, root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    assert tree(current_version(root)) == full_export(data, tmp_path / 'full')
+
+
+def test_checkpoint_ahead_of_export_rewrites_it(tmp_path):
+    data = synthetic_ohlcv(200, 4, seed=7)
+    root, checkpoint = str(tmp_path / 'frontend_data'), str(tmp_path / 'checkpoint')
+    run_incremental(data.iloc[:120], root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    # A checkpoint saved without its export being published
+    ahead = Backtester(data.iloc[:160], INITIAL_VALUE)
+    ahead.run(progress=False)
+    ahead.save_checkpoint(checkpoint)
+
+    run_incremental(data, root, checkpoint, INITIAL_VALUE, progress=False, workers=1)
+    assert tree(current_version(root)) == full_export(data, tmp_path / 'full')
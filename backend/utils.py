@@ -1,58 +1,115 @@
 import os
+import sqlite3
+import threading
+
 import pandas as pd
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from auth_pool import BoundedExecutor, Saturated
+
 CSV_FILE = 'users.csv'
+DB_FILE = os.getenv('USERS_DB', 'users.db')
 
-def load_users():
-    if not os.path.exists(CSV_FILE):
-        return pd.DataFrame(columns=['name', 'email', 'password', 'is_logged_in'])
+# Bumped once users.csv has been imported, so the migration only ever runs once per database
+SCHEMA_VERSION = 1
+
+_local = threading.local()
+
+# The password KDF is deliberately slow; it runs here instead of on request threads.
+# Callers get auth_pool.Saturated when the queue is full.
+AUTH_POOL = BoundedExecutor(
+    max_workers=int(os.getenv('AUTH_WORKERS', 2)),
+    max_queue=int(os.getenv('AUTH_QUEUE', 16)),
+)
+
+
+def _create_schema(conn, csv_file):
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            conn.execute('COMMIT')
+            return
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS users ('
+            ' email TEXT PRIMARY KEY,'
+            ' name TEXT NOT NULL,'
+            ' password TEXT NOT NULL,'
+            ' is_logged_in INTEGER NOT NULL DEFAULT 0'
+            ')'
+        )
+        migrated = migrate_csv(conn, csv_file)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    if migrated:
+        print(f"Migrated {migrated} users from {csv_file}")
+
+
+def migrate_csv(conn, csv_file=CSV_FILE) -> int:
+    """Copy the rows of the legacy users.csv into the users table; existing emails are kept"""
+    if not os.path.exists(csv_file):
+        return 0
     try:
-        return pd.read_csv(CSV_FILE)
+        df = pd.read_csv(csv_file)
     except pd.errors.EmptyDataError:
-        return pd.DataFrame(columns=['name', 'email', 'password', 'is_logged_in'])
+        return 0
+    logged_in = df['is_logged_in'].astype(str).str.lower().isin(['true', '1'])
+    rows = zip(df['email'], df['name'], df['password'], logged_in.astype(int))
+    before = conn.total_changes
+    conn.executemany('INSERT OR IGNORE INTO users (email, name, password, is_logged_in) VALUES (?, ?, ?, ?)', rows)
+    return conn.total_changes - before
 
-def save_users(df):
-    df.to_csv(CSV_FILE, index=False)
 
-def create_user(name, email, password):
-    df = load_users()
-    if email in df['email'].values:
-        return False, 'Email already registered'
+def get_connection(db_file=None, csv_file=CSV_FILE):
+    """One connection per thread and process, created on first use"""
+    db_file = db_file or DB_FILE
+    conn = getattr(_local, 'conn', None)
+    # A connection inherited through fork (e.g. Gunicorn preload) must not be reused
+    if conn is None or _local.db_file != db_file or _local.pid != os.getpid():
+        # Autocommit: every statement below is its own short transaction
+        conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+        # WAL lets readers run alongside the single writer across Gunicorn workers
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _create_schema(conn, csv_file)
+        _local.conn, _local.db_file, _local.pid = conn, db_file, os.getpid()
+    return conn
 
-    hashed_password = generate_password_hash(password)
-    new_user = {
-        'name': name,
-        'email': email,
-        'password': hashed_password,
-        'is_logged_in': False  # set False until login
-    }
 
-    df = pd.concat([df, pd.DataFrame([new_user])], ignore_index=True)
-    save_users(df)
+def load_users():
+    return pd.read_sql_query('SELECT name, email, password, is_logged_in FROM users', get_connection())
+
+def create_user(name, email, password):
+    # Hash outside the database so the write itself stays short
+    hashed_password = AUTH_POOL.run(generate_password_hash, password)
+    try:
+        get_connection().execute(
+            'INSERT INTO users (email, name, password, is_logged_in) VALUES (?, ?, ?, 0)',  # set False until login
+            (email, name, hashed_password),
+        )
+    except sqlite3.IntegrityError:
+        return False, 'Email already registered'
     return True, 'Signup successful'
 
 def authenticate_user(email, password):
-    df = load_users()
-    user = df[df['email'] == email]
+    conn = get_connection()
+    user = conn.execute('SELECT password FROM users WHERE email = ?', (email,)).fetchone()
 
-    if user.empty:
+    if user is None:
         return False, 'User not found'
 
-    stored_password = user.iloc[0]['password']
-    if not check_password_hash(stored_password, password):
+    stored_password = user[0]
+    if not AUTH_POOL.run(check_password_hash, stored_password, password):
         return False, 'Incorrect password'
 
     # Login successful; update flag
-    df.loc[df['email'] == email, 'is_logged_in'] = True
-    save_users(df)
+    conn.execute('UPDATE users SET is_logged_in = 1 WHERE email = ?', (email,))
     return True, 'Login successful'
 
 def logout_user(email):
-    df = load_users()
-    if email not in df['email'].values:
+    cursor = get_connection().execute('UPDATE users SET is_logged_in = 0 WHERE email = ?', (email,))
+    if cursor.rowcount == 0:
         return False, 'Email not found'
-
-    df.loc[df['email'] == email, 'is_logged_in'] = False
-    save_users(df)
     return True, 'Logout successful'
@@ -53,6 +53,24 @@ interface PerformanceMetric {
   description: string;
 }
 
+// Chart files are columnar (parallel arrays, action as an index into `actions`);
+// older exports stored one object per bar under `data`
+const toCandlestickPoints = (chart: any): CandlestickDataPoint[] => {
+  const formatDate = (date: string) => new Date(date).toLocaleDateString('en-US', { month: 'short' });
+  if (Array.isArray(chart.data)) {
+    return chart.data.map((item: any) => ({
+      date: formatDate(item.date),
+      value: item.close,
+      action: item.action
+    }));
+  }
+  return chart.date.map((date: string, i: number) => ({
+    date: formatDate(date),
+    value: chart.close[i],
+    action: chart.actions[chart.action[i]]
+  }));
+};
+
 const Platform = () => {
   const navigate = useNavigate();
   const [selectedTimeframe, setSelectedTimeframe] = useState('1Y');
@@ -113,17 +131,16 @@ const Platform = () => {
         const defaultStocks = tickers.slice(0, 3);
         setSelectedStocks(defaultStocks);
         
-        // Fetch data for default stocks
+        // Fetch data for default stocks in one request
         const stockData: StockData = {};
-        for (const ticker of defaultStocks) {
-          const res = await fetch(`http://localhost:5001/candlestick/${ticker}`);
-          if (!res.ok) continue;
-          const data = await res.json();
-          stockData[ticker] = data.data.map((item: any) => ({
-            date: new Date(item.date).toLocaleDateString('en-US', { month: 'short' }),
-            value: item.close,
-            action: item.action
-          }));
+        if (defaultStocks.length > 0) {
+          const res = await fetch(`http://localhost:5001/candlesticks?tickers=${defaultStocks.map(encodeURIComponent).join(',')}`);
+          if (res.ok) {
+            const { charts } = await res.json();
+            for (const ticker of Object.keys(charts)) {
+              stockData[ticker] = toCandlestickPoints(charts[ticker]);
+            }
+          }
         }
         setStockData(stockData);
         
@@ -211,11 +228,7 @@ const Platform = () => {
           const res = await fetch(`http://localhost:5001/candlestick/${stock}`);
           if (!res.ok) return;
           const data = await res.json();
-          const formattedData = data.data.map((item: any) => ({
-            date: new Date(item.date).toLocaleDateString('en-US', { month: 'short' }),
-            value: item.close,
-            action: item.action
-          }));
+          const formattedData = toCandlestickPoints(data);
           
           setStockData(prev => ({
             ...prev,